@@ -0,0 +1,326 @@
+import multiprocessing
+import os
+import signal
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from application.ocr_service import OCRService
+from infrastructure.instrumentation import count, merge_metrics, profile_bytes, record_document
+from infrastructure.memory_guard import MemoryLimitExceeded, set_memory_limit
+from infrastructure.pdf_handler import PARSER_VERSION, PDFHandler
+from infrastructure.result_cache import DEFAULT_CACHE_MAX_BYTES, ResultCache
+
+# Per-process OCRService, created once by the pool initializer
+_worker_service = None
+
+# Set in a pool worker once a document pushed it over its memory ceiling
+_worker_retired = False
+
+# Document kind -> OCRService method that extracts it
+DOCUMENT_KINDS = {
+    "pdf": "extract_pdf",
+    "excel": "process_excel",
+    "ktp": "process_ktp",
+}
+
+
+class DocumentTimeoutError(BaseException):
+    """Raised when a single document exceeds its processing time budget
+
+    A BaseException, like KeyboardInterrupt: the alarm can fire anywhere in the
+    document's extraction, including inside the OCR fallbacks' catch-all handlers,
+    and none of them may swallow it and let the document run on past its budget.
+    Code that reports document failures catches DOCUMENT_ERRORS.
+    """
+
+
+# Every way a single document can fail without taking its process down
+DOCUMENT_ERRORS = (Exception, DocumentTimeoutError)
+
+
+class WorkerRetired(Exception):
+    """Raised instead of processing a document on a pool worker retired after MemoryLimitExceeded
+
+    CPython seldom returns freed memory to the OS, so such a worker would stay over
+    its ceiling and fail every later document on its first page. Not a document
+    failure: the caller replaces the pool (the old one finishes what it is running
+    and exits) and resubmits the document there.
+    """
+
+
+class BatchResult:
+    """Outcome of processing one document in a batch"""
+
+    def __init__(self, pdf_path, result=None, error=None, metrics=None, profile=None):
+        self.pdf_path = pdf_path
+        self.result = result
+        self.error = error
+        # Per-stage timings and counters (StageRecorder.as_dict), and the cProfile dump if requested
+        self.metrics = metrics
+        self.profile = profile
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        return f"BatchResult(pdf_path={self.pdf_path}, ok={self.ok}, error={self.error})"
+
+
+def init_worker(cache_dir=None, cache_max_bytes=DEFAULT_CACHE_MAX_BYTES, pdf_options=None, memory_limit=None):
+    """Builds the per-worker OCRService; its OCR backend is only loaded if a worker needs it
+
+    memory_limit is the worker's RSS ceiling in bytes: a PDF that pushes the worker
+    past it fails with MemoryLimitExceeded instead of growing until the OOM killer hits.
+    """
+    global _worker_service
+    set_memory_limit(memory_limit)
+    result_cache = None
+    if cache_dir:
+        result_cache = ResultCache(cache_dir, max_bytes=cache_max_bytes, version=PARSER_VERSION)
+    _worker_service = OCRService(result_cache=result_cache, pdf_options=pdf_options)
+
+
+def _raise_timeout(signum, frame):
+    raise DocumentTimeoutError("document processing timed out")
+
+
+def process_document(pdf_path, timeout=None, profile=False, kind="pdf", page_range=None):
+    """Processes one document (a PDF unless kind says otherwise) inside a worker, enforcing the timeout
+
+    Returns (result, stage metrics, cProfile dump or None). With a (start, stop)
+    page_range, only those pages of the PDF are extracted and the result is their
+    parsed fields. A failed document's metrics travel on the raised exception as
+    its metrics attribute.
+    """
+    global _worker_retired
+    if _worker_retired:
+        raise WorkerRetired(f"worker {os.getpid()} went over its memory ceiling")
+
+    # SIGALRM interrupts pure-Python work (pdfminer layout, subprocess waits)
+    use_alarm = bool(timeout) and hasattr(signal, "setitimer")
+    if use_alarm:
+        previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    recorder = None
+    try:
+        with record_document(profile) as (recorder, profiler):
+            if page_range is None:
+                result = getattr(_worker_service, DOCUMENT_KINDS[kind])(pdf_path)
+            else:
+                result = _worker_service.process_pdf_pages(pdf_path, *page_range)
+    except DOCUMENT_ERRORS as e:
+        if recorder is not None:
+            e.metrics = recorder.as_dict()
+        # A pool worker retires; in-process (serial) runs have no replacement process
+        if isinstance(e, MemoryLimitExceeded) and multiprocessing.parent_process() is not None:
+            _worker_retired = True
+        raise
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+    return result, recorder.as_dict(), profiler and profile_bytes(profiler)
+
+
+def _result_item(pdf_path, outcome):
+    result, metrics, profile = outcome
+    return BatchResult(pdf_path, result=result, metrics=metrics, profile=profile)
+
+
+def _error_item(pdf_path, error):
+    return BatchResult(pdf_path, error=_describe_error(error), metrics=getattr(error, "metrics", None))
+
+
+def _describe_error(error):
+    return f"{type(error).__name__}: {error}"
+
+
+class ShardedDocument:
+    """A PDF split into page ranges that run as separate pool tasks and merge in page order"""
+
+    def __init__(self, pdf_path, page_ranges, cache_key=None):
+        self.pdf_path = pdf_path
+        self.page_ranges = page_ranges
+        self.cache_key = cache_key
+        self.outcomes = [None] * len(page_ranges)
+        self.remaining = len(page_ranges)
+        self.error = None
+
+    def finish(self, service):
+        """BatchResult of the whole document once every range is done"""
+        if self.error is not None:
+            return self.error
+        metrics = [metrics for _, metrics, _ in self.outcomes]
+        with record_document() as (recorder, _):
+            count("page_shards", len(self.page_ranges))
+            parsed_pages = [page for parsed, _, _ in self.outcomes for page in parsed]
+            result = service.merge_pdf_pages(parsed_pages)
+            if self.cache_key is not None and PDFHandler.pages_complete(parsed_pages):
+                service.result_cache.put(self.cache_key, result)
+        return BatchResult(self.pdf_path, result=result, metrics=merge_metrics(metrics + [recorder.as_dict()]))
+
+
+class BatchRunner:
+    """Spreads PDF documents across a process pool with bounded in-flight work"""
+
+    def __init__(self, max_workers=None, max_in_flight=None, timeout=None,
+                 cache_dir=None, cache_max_bytes=DEFAULT_CACHE_MAX_BYTES, pdf_options=None, profile=False,
+                 shard_pages=None, memory_limit=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or self.max_workers * 2
+        self.timeout = timeout
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+        self.pdf_options = pdf_options
+        # Run every document under cProfile (costly; for diagnosing slow runs)
+        self.profile = profile
+        # PDFs longer than this many pages are split into ranges of this size that run in
+        # parallel on the pool (pool mode only), so one large scan no longer holds up a batch
+        self.shard_pages = shard_pages
+        # Per-worker RSS ceiling in bytes, checked between pages
+        self.memory_limit = memory_limit
+
+    def run(self, pdf_paths):
+        """Yields a BatchResult per document, in completion order"""
+        if self.max_workers <= 1:
+            yield from self._run_serial(pdf_paths)
+        else:
+            yield from self._run_pool(pdf_paths)
+
+    def _run_serial(self, pdf_paths):
+        init_worker(self.cache_dir, self.cache_max_bytes, self.pdf_options, self.memory_limit)
+        for pdf_path in pdf_paths:
+            try:
+                item = _result_item(pdf_path, process_document(pdf_path, self.timeout, self.profile))
+            except DOCUMENT_ERRORS as e:
+                item = _error_item(pdf_path, e)
+            yield item
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=init_worker,
+            initargs=(self.cache_dir, self.cache_max_bytes, self.pdf_options, self.memory_limit),
+        )
+
+    def _shard(self, pdf_path, service):
+        """ShardedDocument for a PDF worth splitting, a cached BatchResult, or None to run it whole"""
+        try:
+            page_count = PDFHandler.page_count(pdf_path)
+        except Exception:
+            # Unreadable here: a worker reports the error as for any other document
+            return None
+        if page_count <= self.shard_pages:
+            return None
+
+        cache_key = None
+        if service.result_cache is not None:
+            cache_key = service.pdf_cache_key(pdf_path)
+            result = service.result_cache.get(cache_key)
+            if result is not None:
+                return BatchResult(pdf_path, result=result, metrics={"stages": {}, "counters": {}})
+        page_ranges = [(start, min(start + self.shard_pages, page_count))
+                       for start in range(0, page_count, self.shard_pages)]
+        return ShardedDocument(pdf_path, page_ranges, cache_key)
+
+    def _run_pool(self, pdf_paths):
+        pending_paths = iter(pdf_paths)
+        # Pool tasks not submitted yet: (pdf_path, ShardedDocument or None, range index)
+        pending_tasks = deque()
+        in_flight = {}
+        service = None
+        if self.shard_pages:
+            # Merges split documents and caches their results in this process
+            result_cache = None
+            if self.cache_dir:
+                result_cache = ResultCache(self.cache_dir, max_bytes=self.cache_max_bytes, version=PARSER_VERSION)
+            service = OCRService(result_cache=result_cache, pdf_options=self.pdf_options)
+        pool = self._new_pool()
+        # Futures of pools already replaced after a worker retired; they do not retire the current one
+        retired_futures = set()
+        try:
+            while True:
+                # Keep at most max_in_flight tasks submitted at any time
+                while len(in_flight) < self.max_in_flight:
+                    if not pending_tasks:
+                        pdf_path = next(pending_paths, None)
+                        if pdf_path is None:
+                            break
+                        document = self._shard(pdf_path, service) if service is not None else None
+                        if isinstance(document, BatchResult):
+                            yield document
+                        elif document is None:
+                            pending_tasks.append((pdf_path, None, None))
+                        else:
+                            pending_tasks.extend((pdf_path, document, index)
+                                                 for index in range(len(document.page_ranges)))
+                        continue
+
+                    pdf_path, document, index = pending_tasks.popleft()
+                    if document is not None and document.error is not None:
+                        # The document already failed; its remaining ranges are not worth running
+                        document.remaining -= 1
+                        if document.remaining == 0:
+                            yield document.finish(service)
+                        continue
+                    page_range = None if document is None else document.page_ranges[index]
+                    future = pool.submit(process_document, pdf_path, self.timeout, self.profile, "pdf", page_range)
+                    in_flight[future] = (pdf_path, document, index)
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                pool_broken = False
+                retire_pool = False
+                for future in done:
+                    pdf_path, document, index = in_flight.pop(future)
+                    try:
+                        outcome, error = future.result(), None
+                    except BrokenProcessPool as e:
+                        pool_broken = True
+                        outcome, error = None, e
+                    except WorkerRetired:
+                        # Refused by a retired worker: runs again on the replacement pool
+                        pending_tasks.appendleft((pdf_path, document, index))
+                        retire_pool = retire_pool or future not in retired_futures
+                        continue
+                    except DOCUMENT_ERRORS as e:
+                        outcome, error = None, e
+                        if isinstance(e, MemoryLimitExceeded) and future not in retired_futures:
+                            retire_pool = True
+
+                    if document is None:
+                        yield _error_item(pdf_path, error) if error is not None else _result_item(pdf_path, outcome)
+                        continue
+                    # A range failing fails its document; the first error is the one reported
+                    if error is not None and document.error is None:
+                        document.error = _error_item(pdf_path, error)
+                    document.outcomes[index] = outcome
+                    document.remaining -= 1
+                    if document.remaining == 0:
+                        yield document.finish(service)
+
+                if pool_broken:
+                    # A worker died (e.g. native crash); fail what it took down and start a fresh pool
+                    for pdf_path, document, index in in_flight.values():
+                        error = BatchResult(pdf_path, error="BrokenProcessPool: worker terminated abruptly")
+                        if document is None:
+                            yield error
+                            continue
+                        document.error = document.error or error
+                        document.remaining -= 1
+                        if document.remaining == 0:
+                            yield document.finish(service)
+                    in_flight.clear()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = self._new_pool()
+                elif retire_pool:
+                    # A worker went over its memory ceiling: new work goes to a fresh pool, and the
+                    # old one exits once its running and queued tasks are done
+                    retired_futures.update(in_flight)
+                    pool.shutdown(wait=False)
+                    pool = self._new_pool()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,366 @@
+import asyncio
+import json
+import os
+import signal
+import tempfile
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from application.batch_runner import (DOCUMENT_ERRORS, DOCUMENT_KINDS, DocumentTimeoutError, WorkerRetired,
+                                      init_worker, process_document)
+from domain.customer_list import expand_customers
+from infrastructure.memory_guard import MemoryLimitExceeded
+from infrastructure.result_cache import DEFAULT_CACHE_MAX_BYTES
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+MAX_HEADER_BYTES = 64 * 1024
+KEEP_ALIVE_TIMEOUT = 30  # seconds an idle connection is kept open
+JOB_TTL = 3600  # seconds a finished async job stays available for polling
+MAX_JOBS = 10000
+LATENCY_WINDOW = 1000  # most recent request latencies kept for the percentiles
+
+# Suffix of the spooled upload, which the handlers use to pick a decoder; ?filename= overrides it
+UPLOAD_SUFFIXES = {"pdf": ".pdf", "excel": ".xlsx", "ktp": ".jpg"}
+
+
+class HTTPError(Exception):
+    """An error answered with the given status and a JSON {"error": message} body"""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class Job:
+    """One uploaded document and its extraction outcome"""
+
+    def __init__(self, kind, path):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.path = path
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.error_status = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.done = asyncio.Event()
+
+    def as_dict(self):
+        job = {"job_id": self.id, "kind": self.kind, "status": self.status}
+        if self.status == "done":
+            job["result"] = expand_customers(self.result)
+        elif self.status == "failed":
+            job["error"] = self.error
+        return job
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ExtractionService:
+    """Asyncio HTTP front end for OCRService over a warm process pool
+
+    Uploads wait in a bounded queue; when it is full new uploads are answered with
+    429 instead of piling up. One dispatcher per worker feeds the pool, so at most
+    `workers` documents are being extracted at any time.
+
+    POST /extract/<kind>   extract and answer with the result (kind: pdf, excel, ktp)
+    POST /jobs/<kind>      queue and answer 202 with a job id
+    GET  /jobs/<job_id>    job status, with the result once done
+    GET  /health           liveness and queue state
+    GET  /metrics          counters and latency percentiles
+    """
+
+    def __init__(self, workers=None, queue_size=64, timeout=None, cache_dir=None,
+                 cache_max_bytes=DEFAULT_CACHE_MAX_BYTES, pdf_options=None, spool_dir=None, memory_limit=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+        self.pdf_options = pdf_options
+        self.spool_dir = spool_dir
+        self.memory_limit = memory_limit
+        self.jobs = OrderedDict()
+        self.started = time.time()
+        self.counters = {"requests": 0, "accepted": 0, "rejected": 0, "completed": 0, "failed": 0}
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.running = 0
+        self.pool = None
+        self.queue = None
+        self._dispatchers = []
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=init_worker,
+            initargs=(self.cache_dir, self.cache_max_bytes, self.pdf_options, self.memory_limit),
+        )
+
+    async def start(self):
+        """Starts the worker pool (processes spawned and initialized up front) and the dispatchers"""
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.pool = self._new_pool()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, os.getpid) for _ in range(self.workers)))
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for dispatcher in self._dispatchers:
+            dispatcher.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+    async def serve(self, host="127.0.0.1", port=8080):
+        """Runs the service until SIGINT/SIGTERM"""
+        await self.start()
+        server = await asyncio.start_server(self._handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        print(f"Serving on http://{host}:{port} with {self.workers} worker(s), queue size {self.queue_size}")
+        async with server:
+            await stop.wait()
+        await self.stop()
+
+    # Queue and workers
+
+    async def submit(self, kind, body, filename=None):
+        """Spools an upload and queues it; raises 429 when the queue is full"""
+        if self.queue.full():
+            raise self._rejected()
+        suffix = os.path.splitext(filename)[1] if filename else UPLOAD_SUFFIXES[kind]
+        loop = asyncio.get_running_loop()
+        path = await loop.run_in_executor(None, self._spool, body, suffix)
+        job = Job(kind, path)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            os.unlink(path)
+            raise self._rejected() from None
+        self.counters["accepted"] += 1
+        return job
+
+    def _rejected(self):
+        self.counters["rejected"] += 1
+        return HTTPError(HTTPStatus.TOO_MANY_REQUESTS, "extraction queue is full, retry later",
+                         headers={"Retry-After": "1"})
+
+    def _spool(self, body, suffix):
+        fd, path = tempfile.mkstemp(suffix=suffix, dir=self.spool_dir)
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        return path
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            job.status = "running"
+            job.started = time.time()
+            self.running += 1
+            try:
+                while True:
+                    pool = self.pool
+                    try:
+                        outcome = await loop.run_in_executor(
+                            pool, process_document, job.path, self.timeout, False, job.kind
+                        )
+                        break
+                    except WorkerRetired:
+                        # Refused by a worker that went over its memory ceiling: rerun on a fresh pool
+                        self._retire_pool(pool)
+                job.result = outcome[0]
+                job.status = "done"
+                self.counters["completed"] += 1
+            except DOCUMENT_ERRORS as e:
+                job.status = "failed"
+                job.error = f"{type(e).__name__}: {e}"
+                if isinstance(e, DocumentTimeoutError):
+                    job.error_status = HTTPStatus.GATEWAY_TIMEOUT
+                elif isinstance(e, BrokenProcessPool):
+                    # A worker died (e.g. native crash); replace the pool for the next jobs
+                    job.error_status = HTTPStatus.INTERNAL_SERVER_ERROR
+                    if pool is self.pool:
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        self.pool = self._new_pool()
+                elif isinstance(e, MemoryLimitExceeded):
+                    # The worker retires; later jobs go to a fresh pool
+                    job.error_status = HTTPStatus.UNPROCESSABLE_ENTITY
+                    self._retire_pool(pool)
+                else:
+                    job.error_status = HTTPStatus.UNPROCESSABLE_ENTITY
+                self.counters["failed"] += 1
+            finally:
+                self.running -= 1
+                job.finished = time.time()
+                self.latencies.append(job.finished - job.created)
+                try:
+                    os.unlink(job.path)
+                except OSError:
+                    pass
+                job.done.set()
+                self.queue.task_done()
+
+    def _retire_pool(self, pool):
+        """Moves new jobs to a fresh pool after a worker of pool went over its memory ceiling
+
+        The old pool exits once the jobs already submitted to it are done.
+        """
+        if pool is self.pool:
+            self.pool = self._new_pool()
+            pool.shutdown(wait=False)
+
+    def _register(self, job):
+        """Keeps an async job for polling, dropping finished jobs past their TTL or over MAX_JOBS"""
+        now = time.time()
+        for job_id, old in list(self.jobs.items()):
+            if len(self.jobs) < MAX_JOBS and not (old.finished and now - old.finished > JOB_TTL):
+                break
+            if old.finished:
+                del self.jobs[job_id]
+        self.jobs[job.id] = job
+
+    # HTTP
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), KEEP_ALIVE_TIMEOUT)
+                except HTTPError as e:
+                    await self._write_response(writer, e.status, {"error": e.message}, e.headers, False)
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    status, payload, extra_headers = await self._route(method, target, headers, body)
+                except HTTPError as e:
+                    status, payload, extra_headers = e.status, {"error": e.message}, e.headers
+                await self._write_response(writer, status, payload, extra_headers, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        """Reads one HTTP/1.1 request; returns None when the client closed the connection"""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "incomplete request") from None
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "request header too large") from None
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "malformed request line") from None
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+        if "transfer-encoding" in headers:
+            raise HTTPError(HTTPStatus.LENGTH_REQUIRED, "chunked uploads are not supported; send Content-Length")
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "invalid Content-Length") from None
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"upload exceeds {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    async def _route(self, method, target, headers, body):
+        """Returns (status, JSON payload, extra headers) for a request"""
+        url = urlsplit(target)
+        parts = [part for part in url.path.split("/") if part]
+        self.counters["requests"] += 1
+
+        if parts == ["health"] and method == "GET":
+            return HTTPStatus.OK, {
+                "status": "ok",
+                "workers": self.workers,
+                "queue_depth": self.queue.qsize(),
+                "queue_size": self.queue_size,
+            }, {}
+        if parts == ["metrics"] and method == "GET":
+            return HTTPStatus.OK, self.metrics(), {}
+
+        if len(parts) == 2 and parts[0] in ("extract", "jobs") and method == "POST":
+            kind = parts[1]
+            if kind not in DOCUMENT_KINDS:
+                raise HTTPError(HTTPStatus.NOT_FOUND, f"unknown document kind {kind!r}, expected one of "
+                                                      f"{sorted(DOCUMENT_KINDS)}")
+            if not body:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "empty upload; send the file as the request body")
+            filename = parse_qs(url.query).get("filename", [headers.get("x-filename")])[0]
+            job = await self.submit(kind, body, filename)
+
+            if parts[0] == "jobs":
+                self._register(job)
+                return HTTPStatus.ACCEPTED, job.as_dict(), {"Location": f"/jobs/{job.id}"}
+
+            await job.done.wait()
+            if job.status == "failed":
+                raise HTTPError(job.error_status, job.error)
+            return HTTPStatus.OK, {"job_id": job.id, "kind": kind, "result": expand_customers(job.result)}, {}
+
+        if len(parts) == 2 and parts[0] == "jobs" and method == "GET":
+            job = self.jobs.get(parts[1])
+            if job is None:
+                raise HTTPError(HTTPStatus.NOT_FOUND, "unknown or expired job id")
+            return HTTPStatus.OK, job.as_dict(), {}
+
+        raise HTTPError(HTTPStatus.NOT_FOUND, f"no route for {method} {url.path}")
+
+    def metrics(self):
+        latencies = list(self.latencies)
+        return {
+            "uptime_s": round(time.time() - self.started, 3),
+            "workers": self.workers,
+            "queue_depth": self.queue.qsize(),
+            "queue_size": self.queue_size,
+            "running": self.running,
+            "jobs_tracked": len(self.jobs),
+            **{f"{name}_total": value for name, value in self.counters.items()},
+            "latency_p50_s": _percentile(latencies, 0.50),
+            "latency_p99_s": _percentile(latencies, 0.99),
+        }
+
+    @staticmethod
+    async def _write_response(writer, status, payload, headers, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        status = HTTPStatus(status)
+        head = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        head.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
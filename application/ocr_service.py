@@ -1,27 +1,105 @@
+import json
+from typing import TYPE_CHECKING
+
+from domain.customer_list import expand_customers
 from domain.text_cleaner import TextCleaner
 from domain.models import OCRResult
-from infrastructure.easyocr_adapter import EasyOCRAdapter
 from infrastructure.pdf_handler import PDFHandler
-from infrastructure.excel_handler import ExcelHandler
+from infrastructure.excel_handler import EXCEL_CHUNK_ROWS, ExcelHandler
+from infrastructure.instrumentation import stage
+from infrastructure.product_index import ProductIndex
+from infrastructure.result_cache import ResultCache
+
+if TYPE_CHECKING:
+    from infrastructure.easyocr_adapter import EasyOCRAdapter
 
 class OCRService:
     """Handles OCR processing for PDF, Excel, and KTP"""
 
-    def __init__(self, ocr_adapter: EasyOCRAdapter):
-        self.ocr_adapter = ocr_adapter
+    def __init__(self, ocr_adapter: "EasyOCRAdapter" = None, result_cache: ResultCache = None,
+                 ocr_adapter_factory=None, pdf_options: dict = None):
+        self._ocr_adapter = ocr_adapter
+        self._ocr_adapter_factory = ocr_adapter_factory
         self.cleaner = TextCleaner()
+        self.result_cache = result_cache
+        # Keyword arguments for PDFHandler.extract_text_from_pdf (e.g. ocr_mode)
+        self.pdf_options = dict(pdf_options or {})
+
+    @property
+    def ocr_adapter(self) -> "EasyOCRAdapter":
+        """OCR backend, resolved on first use so PDF and Excel runs never load EasyOCR"""
+        if self._ocr_adapter is None:
+            factory = self._ocr_adapter_factory
+            if factory is None:
+                from infrastructure.easyocr_adapter import EasyOCRAdapter
+                factory = EasyOCRAdapter
+            self._ocr_adapter = factory()
+        return self._ocr_adapter
 
     def process_pdf(self, pdf_path: str):
         """Extract text from PDF and return JSON"""
-        return PDFHandler.extract_text_from_pdf(pdf_path)
-    @staticmethod
+        return expand_customers(self.extract_pdf(pdf_path))
+
+    def extract_pdf(self, pdf_path: str):
+        """JSON result of a PDF with list_customer kept as a CustomerList, as workers hand it to the sinks"""
+        if self.result_cache is None:
+            return PDFHandler.extract_text_from_pdf(pdf_path, **self.pdf_options)
+
+        # Unchanged (or byte-identical) PDFs are served from the cache without any parsing or OCR
+        with stage("cache_lookup"):
+            cache_key = self.pdf_cache_key(pdf_path)
+            result = self.result_cache.get(cache_key)
+        if result is None:
+            # Pages shared with documents seen before (e.g. a CP's earlier revision) come from the cache too
+            parsed_pages = self.process_pdf_pages(pdf_path, 0, None)
+            result = self.merge_pdf_pages(parsed_pages)
+            # A result missing the text of a failed OCR is returned but not kept; the next run retries it
+            if PDFHandler.pages_complete(parsed_pages):
+                with stage("cache_store"):
+                    self.result_cache.put(cache_key, result)
+        return result
+
+    def process_pdf_pages(self, pdf_path: str, start: int, stop: int):
+        """Parsed fields of pages [start, stop) of a PDF whose pages are split across workers"""
+        options = {name: value for name, value in self.pdf_options.items() if name != "product_master"}
+        return PDFHandler.extract_page_range(pdf_path, start, stop, page_cache=self.result_cache, **options)
+
+    def merge_pdf_pages(self, parsed_pages):
+        """JSON result of a PDF from the parsed fields of all its pages, in page order"""
+        return PDFHandler.merge_pages(parsed_pages, self.pdf_options.get("product_master"))
+
+    def pdf_cache_key(self, pdf_path: str):
+        """Result cache key of a PDF under the current options"""
+        return self.result_cache.key_for(pdf_path, variant=self.pdf_variant())
+
+    def pdf_variant(self):
+        """Cache variant of the PDF options; a product master counts by its contents, not its path"""
+        options = dict(self.pdf_options)
+        if options.get("product_master"):
+            options["product_master"] = ProductIndex.load(options["product_master"]).fingerprint
+        return json.dumps(options, sort_keys=True)
+
     def process_excel(self, excel_path: str):
         """Extract data from Excel and return JSON"""
         return ExcelHandler.extract_data_from_excel(excel_path)
 
+    def iter_excel(self, excel_path: str, sheets=None, chunk_size: int = EXCEL_CHUNK_ROWS, dtypes=None):
+        """Yield (sheet name, records) chunks from an Excel file with bounded memory"""
+        yield from ExcelHandler.iter_excel_records(excel_path, sheets=sheets, chunk_size=chunk_size, dtypes=dtypes)
+
     def process_ktp(self, image_path: str):
         """Extract text from KTP image"""
         raw_text = self.ocr_adapter.process_ktp(image_path)
         ocr_result = OCRResult(raw_text)
         ocr_result.clean_text(self.cleaner)
-        return ocr_result.cleaned_text
\ No newline at end of file
+        return ocr_result.cleaned_text
+
+    def process_ktp_batch(self, image_paths, batch_size: int = 8, workers: int = None):
+        """Extract text from many KTP images with batched inference, in input order"""
+        raw_texts = self.ocr_adapter.process_ktp_batch(image_paths, batch_size=batch_size, workers=workers)
+        cleaned_texts = []
+        for raw_text in raw_texts:
+            ocr_result = OCRResult(raw_text)
+            ocr_result.clean_text(self.cleaner)
+            cleaned_texts.append(ocr_result.cleaned_text)
+        return cleaned_texts
@@ -0,0 +1,169 @@
+import os
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from application.batch_runner import DOCUMENT_ERRORS, WorkerRetired, init_worker, process_document
+from infrastructure.folder_watcher import DEFAULT_POLL_INTERVAL, FolderWatcher
+from infrastructure.memory_guard import MemoryLimitExceeded
+from infrastructure.result_cache import DEFAULT_CACHE_MAX_BYTES
+
+# Longest wait for finished documents or new files before the loop checks everything again
+IDLE_WAIT = 1.0
+
+
+def init_daemon_worker(*init_args):
+    """init_worker for the daemon's pool; stopping is the daemon's decision, not the workers'"""
+    # A Ctrl-C or SIGTERM sent to the whole process group must not kill documents mid-extraction:
+    # the daemon finishes them and then shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    init_worker(*init_args)
+
+
+class WatchDaemon:
+    """Extracts PDFs dropped into watched folders as they arrive, until SIGINT/SIGTERM
+
+    Files found at startup and every file created or changed afterwards become
+    jobs in a JobQueue; due jobs run on a pool of warm worker processes and each
+    result goes to the output sink as soon as it is ready. A failed document is
+    retried with backoff and dead-lettered after the queue's max_attempts. On
+    shutdown, documents already running are finished; jobs interrupted by a crash
+    are picked up again on the next start.
+    """
+
+    def __init__(self, directories, queue, sink, workers=None, timeout=None, cache_dir=None,
+                 cache_max_bytes=DEFAULT_CACHE_MAX_BYTES, pdf_options=None, memory_limit=None,
+                 poll_interval=DEFAULT_POLL_INTERVAL):
+        self.directories = directories
+        self.queue = queue
+        self.sink = sink
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+        self.pdf_options = pdf_options
+        self.memory_limit = memory_limit
+        self.poll_interval = poll_interval
+        self.stopping = False
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=init_daemon_worker,
+            initargs=(self.cache_dir, self.cache_max_bytes, self.pdf_options, self.memory_limit),
+        )
+
+    def stop(self, *_):
+        """Stops taking new jobs; the running ones are finished first"""
+        self.stopping = True
+
+    def run(self):
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, self.stop)
+
+        # A killed daemon loses nothing: the jobs it was running are requeued here
+        recovered = self.queue.recover()
+        if recovered:
+            print(f"Requeued {recovered} job(s) interrupted by the previous run")
+        with FolderWatcher(self.directories, poll_interval=self.poll_interval) as watcher:
+            self._enqueue(watcher.scan())
+            print(f"Watching {', '.join(self.directories)} ({watcher.mode}) with {self.workers} worker(s)")
+            pool = self._new_pool()
+            in_flight = {}
+            # Futures of pools already replaced after a worker retired; they do not retire the current one
+            retired_futures = set()
+            try:
+                while not self.stopping or in_flight:
+                    while not self.stopping and len(in_flight) < self.workers:
+                        job = self.queue.claim()
+                        if job is None:
+                            break
+                        if self._already_written(job):
+                            continue
+                        in_flight[pool.submit(process_document, job.path, self.timeout)] = job
+
+                    if in_flight:
+                        done, _ = wait(in_flight, timeout=IDLE_WAIT, return_when=FIRST_COMPLETED)
+                        refused = []
+                        retire_pool = False
+                        for future in done:
+                            job = in_flight.pop(future)
+                            error = self._finish(job, future)
+                            if isinstance(error, BrokenProcessPool):
+                                # A worker died (e.g. native crash) and took the pool with it
+                                for other in list(in_flight):
+                                    self._finish(in_flight.pop(other), other)
+                                pool.shutdown(wait=False, cancel_futures=True)
+                                pool = self._new_pool()
+                                retired_futures.clear()
+                                refused, retire_pool = [], False
+                                break
+                            if isinstance(error, WorkerRetired):
+                                refused.append(job)
+                            if isinstance(error, (WorkerRetired, MemoryLimitExceeded)):
+                                retire_pool = retire_pool or future not in retired_futures
+                            retired_futures.discard(future)
+                        if retire_pool:
+                            # A worker went over its memory ceiling: new jobs go to a fresh pool, and
+                            # the old one exits once its running and queued jobs are done
+                            retired_futures.update(in_flight)
+                            pool.shutdown(wait=False)
+                            pool = self._new_pool()
+                        for job in refused:
+                            in_flight[pool.submit(process_document, job.path, self.timeout)] = job
+                    if not self.stopping:
+                        self._enqueue(watcher.wait(0 if in_flight else self._idle_timeout()))
+            finally:
+                pool.shutdown(wait=True, cancel_futures=True)
+        print(f"Stopped; jobs by status: {self.queue.counts()}")
+
+    def _idle_timeout(self):
+        due = self.queue.next_due()
+        return IDLE_WAIT if due is None else min(max(due - time.time(), 0), IDLE_WAIT)
+
+    def _enqueue(self, paths):
+        for path in paths:
+            try:
+                self.queue.enqueue(path)
+            except FileNotFoundError:
+                # Gone again before it could be hashed (e.g. a temp file renamed away)
+                continue
+
+    def _already_written(self, job):
+        """Completes a job whose output a sink that tracks content (NDJSON) already holds"""
+        try:
+            written = self.sink.is_written(job.path)
+        except FileNotFoundError:
+            self.queue.fail(job.id, "file removed before processing", retry=False)
+            return True
+        if written:
+            self.queue.complete(job.id)
+        return written
+
+    def _finish(self, job, future):
+        """Records a finished job in the queue and the sink; returns the error it failed with, if any
+
+        A job refused by a retired worker (WorkerRetired) is left running, for the caller to resubmit.
+        """
+        filename = os.path.basename(job.path)
+        try:
+            result = future.result()[0]
+        except WorkerRetired as e:
+            return e
+        except DOCUMENT_ERRORS as e:
+            error = f"{type(e).__name__}: {e}"
+            status = self.queue.fail(job.id, error)
+            if status == "dead":
+                print(f"Failed PDF: {filename} ({error}), dead-lettered after {job.attempts} attempt(s)")
+                self.sink.write_error(job.path, error)
+            else:
+                print(f"Failed PDF: {filename} ({error}), will retry")
+            return e
+        # Written before the job is marked done: a crash in between reruns the job, and the
+        # rerun overwrites its JSON file (or is skipped by the NDJSON sink) instead of duplicating it
+        self.sink.write(job.path, result)
+        self.queue.complete(job.id)
+        print(f"Processed PDF: {filename} ({time.time() - job.enqueued_at:.1f}s after it arrived)")
+        return None
@@ -0,0 +1,114 @@
+"""Benchmark: memory and serialization of a 100k-outlet customer list, list of dicts vs. packed ID array
+
+Usage: python -m benchmarks.bench_customer_list [--outlets 100000] [--duplicates 0.05]
+
+A mapping document's outlet IDs arrive as per-page lists (40 per page, with
+--duplicates of them repeated on later pages). "legacy" merges them into one
+list and builds the five-key list_customer dict per ID. "compact" merges them
+into a CustomerList, a deduplicated int64 array, as merge_pages does; results
+carry it that way through the worker pool and the result cache. Memory is the
+tracemalloc peak while merging and the size still held afterwards. Serialization
+covers the pickle a worker sends back to the batch runner, the indented JSON
+file (identical bytes either way: the sink expands the CustomerList as it
+writes), and the NDJSON record as entries vs. the --pack-customers column, with
+the time to read each back.
+"""
+import argparse
+import json
+import pickle
+import random
+import time
+import tracemalloc
+
+from domain.customer_list import CustomerList, expand_customers, pack_customers, packed_object_hook
+
+OUTLETS_PER_PAGE = 40
+
+
+def page_ids(outlets, duplicates, rng):
+    ids = list(range(1000000, 1000000 + outlets))
+    ids.extend(rng.sample(ids, int(outlets * duplicates)))
+    return [ids[i:i + OUTLETS_PER_PAGE] for i in range(0, len(ids), OUTLETS_PER_PAGE)]
+
+
+def legacy_build(pages):
+    customer_ids = []
+    for ids in pages:
+        customer_ids.extend(ids)
+    return [
+        {
+            "m_discountschema_id": 0,
+            "uns_discount_customer_id": 0,
+            "m_discountschemabreak_id": 0,
+            "ad_org_id": 0,
+            "c_bpartner_id": customer_id
+        }
+        for customer_id in customer_ids
+    ]
+
+
+def compact_build(pages):
+    return CustomerList(customer_id for ids in pages for customer_id in ids)
+
+
+def measure_build(build, pages):
+    """(seconds, peak MB, retained MB, result)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build(pages)
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2 ** 20, retained / 2 ** 20, result
+
+
+def timed(function):
+    start = time.perf_counter()
+    value = function()
+    return time.perf_counter() - start, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--outlets", type=int, default=100000)
+    parser.add_argument("--duplicates", type=float, default=0.05,
+                        help="Share of outlets listed a second time on a later page")
+    args = parser.parse_args()
+
+    pages = page_ids(args.outlets, args.duplicates, random.Random(0))
+    total = sum(len(ids) for ids in pages)
+    print(f"{total:,} outlet entries on {len(pages):,} pages, {args.outlets:,} distinct")
+
+    print(f"\n{'build':<10} {'entries':>8} {'ms':>8} {'peak MB':>8} {'held MB':>8}")
+    builds = {}
+    for label, build in (("legacy", legacy_build), ("compact", compact_build)):
+        seconds, peak, retained, builds[label] = measure_build(build, pages)
+        print(f"{label:<10} {len(builds[label]):>8,} {seconds * 1000:>8.1f} {peak:>8.1f} {retained:>8.1f}")
+
+    legacy_result, compact_result = {"list_customer": builds["legacy"]}, {"list_customer": builds["compact"]}
+    # The legacy list keeps duplicates; written output compares the same (deduplicated) outlets
+    deduplicated = {"list_customer": builds["compact"].entries()}
+    rows = [
+        ("pickle", "legacy", lambda: pickle.dumps(legacy_result), None),
+        ("pickle", "compact", lambda: pickle.dumps(compact_result), None),
+        ("json file", "legacy", lambda: json.dumps(deduplicated, indent=4), None),
+        ("json file", "compact", lambda: json.dumps(expand_customers(compact_result), indent=4), None),
+        ("ndjson", "entries", lambda: json.dumps(expand_customers(compact_result), separators=(",", ":")),
+         json.loads),
+        ("ndjson", "packed", lambda: json.dumps(pack_customers(compact_result), separators=(",", ":")),
+         lambda data: json.loads(data, object_hook=packed_object_hook)),
+    ]
+    print(f"\n{'format':<10} {'form':<8} {'MB':>8} {'write ms':>9} {'read ms':>8}")
+    outputs = {}
+    for fmt, form, write, read in rows:
+        write_seconds, data = timed(write)
+        outputs[fmt, form] = data
+        read_ms = f"{timed(lambda: read(data))[0] * 1000:>8.1f}" if read else f"{'':>8}"
+        print(f"{fmt:<10} {form:<8} {len(data) / 2 ** 20:>8.2f} {write_seconds * 1000:>9.1f} {read_ms}")
+
+    assert outputs["json file", "legacy"] == outputs["json file", "compact"]
+    assert json.loads(outputs["ndjson", "packed"], object_hook=packed_object_hook)["list_customer"] == builds["compact"]
+
+
+if __name__ == "__main__":
+    main()
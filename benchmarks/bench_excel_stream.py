@@ -0,0 +1,95 @@
+"""Benchmark: wall time and peak memory of Excel ingestion, pd.read_excel vs. streamed chunks
+
+Usage: python -m benchmarks.bench_excel_stream [--rows 500000] [--chunk-size 10000]
+
+The workbook is a synthetic distributor outlet sheet (outlet id, name, city,
+channel, credit limit, last order date). "legacy" is ExcelHandler.extract_data_from_excel,
+which holds the whole sheet and its records in memory; "stream" consumes
+ExcelHandler.iter_excel_records chunk by chunk and keeps only a running count.
+Each mode runs in its own process so its peak RSS (ru_maxrss) is measured in isolation.
+"""
+import argparse
+import datetime
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = ["legacy", "stream"]
+CITIES = ["JAKARTA", "BANDUNG", "SURABAYA", "MEDAN", "SEMARANG", "MAKASSAR", "DENPASAR", "PALEMBANG"]
+CHANNELS = ["GT", "MT", "HORECA", "WHOLESALE"]
+
+
+def write_outlet_workbook(path, rows):
+    """Outlet master sheet written row by row, so generating it stays flat in memory too"""
+    import openpyxl
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("OUTLET")
+    sheet.append(["OUTLET_ID", "OUTLET_NAME", "CITY", "CHANNEL", "CREDIT_LIMIT", "LAST_ORDER"])
+    start = datetime.datetime(2024, 1, 1)
+    for i in range(rows):
+        sheet.append([
+            20000000 + i,
+            f"TOKO SUMBER REJEKI {i}",
+            CITIES[i % len(CITIES)],
+            CHANNELS[i % len(CHANNELS)],
+            # Some outlets have no credit limit yet
+            None if i % 17 == 0 else (i % 50 + 1) * 1000000,
+            start + datetime.timedelta(days=i % 365),
+        ])
+    workbook.save(path)
+
+
+def run_mode(mode, xlsx_path, chunk_size):
+    """Runs one mode in this process; prints a JSON line with time, record count and peak RSS growth"""
+    import openpyxl  # noqa: F401  Imported before the baseline so both modes start from the same RSS
+    import pandas  # noqa: F401
+
+    from infrastructure.excel_handler import ExcelHandler
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == "legacy":
+        records = len(ExcelHandler.extract_data_from_excel(xlsx_path))
+    else:
+        records = 0
+        for _, chunk in ExcelHandler.iter_excel_records(xlsx_path, chunk_size=chunk_size):
+            records += len(chunk)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"seconds": elapsed, "records": records, "peak_growth_mb": (peak - baseline) / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--xlsx", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.xlsx, args.chunk_size)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        xlsx_path = os.path.join(tmp, "outlets.xlsx")
+        write_outlet_workbook(xlsx_path, args.rows)
+        print(f"{args.rows:,} outlet rows, {os.path.getsize(xlsx_path) / 1e6:.1f} MB xlsx")
+        print(f"{'mode':<8} {'seconds':>8} {'records':>9} {'peak RSS growth':>16}")
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_excel_stream", "--mode", mode, "--xlsx", xlsx_path,
+                 "--chunk-size", str(args.chunk_size)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            stats = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:<8} {stats['seconds']:>8.2f} {stats['records']:>9,} {stats['peak_growth_mb']:>13.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Micro-benchmark: single-scan key-value parser vs. the legacy per-field re.search loop
+
+Usage: python -m benchmarks.bench_kv_parser [--dirs test/ test2/ INT_Diskon_Skema/] [--repeats 1 10 100]
+
+First verifies that PDFHandler.parse_key_value_pairs returns the same dict as the
+legacy implementation for every page of every PDF in --dirs, then times both
+parsers on page texts concatenated --repeats times.
+"""
+import argparse
+import os
+import re
+import time
+
+import pdfplumber
+
+from infrastructure.pdf_handler import PDFHandler
+
+LEGACY_PATTERNS = {
+    "NOMOR": r"NOMOR\s*:\s*(.*)",
+    "PRODUCT CATEGORY": r"PRODUCT CATEGORY\s*:\s*(.*?)\s*REF DOC",
+    "BRAND": r"BRAND\s*:\s*(.*?)\s*REF CP NO",
+    "CHANNEL": r"CHANNEL\s*:\s*(.*?)\s*PERIODE CP",
+    "REGION": r"REGION\s*:\s*(.*?)\s*GROUP OUTLET",
+    "SUB REGION": r"SUB REGION\s*:\s*(.*)",
+    "DISTRIBUTOR": r"DISTRIBUTOR\s*:\s*(.*)",
+    "PROMO TYPE": r"PROMO TYPE\s*:\s*(.*?)\s*COMPENSATION",
+    "SUB PROMO TYPE": r"SUB PROMO TYPE\s*:\s*(.*)",
+    "MECHANISM": r"MECHANISM\s*:\s*([\s\S]*?)(?=\s*DISCOUNT PROMOTION|$)",
+    "REF DOC": r"REF DOC\s*:\s*(.*)",
+    "REF CP NO": r"REF CP NO\s*:\s*(.*)",
+    "PERIODE CP": r"PERIODE CP\s*:\s*(.*)",
+    "GROUP OUTLET": r"GROUP OUTLET\s*:\s*(.*?)\s*SUB REGION",
+    "COMPENSATION": r"COMPENSATION\s*:\s*(.*?)\s*SUB PROMO TYPE"
+}
+
+LEGACY_CHECKBOX_PATTERNS = {
+    "COST CATEGORY": r"COST CATEGORY\s*([\s\S]*?)\s*(?=TIPE CP|$)",
+    "TIPE CP": r"TIPE CP\s*([\s\S]*?)\s*(?=TIPE CLAIM|$)",
+    "TIPE CLAIM": r"TIPE CLAIM\s*([\s\S]*?)\s*(?=CLAIM BASED|$)",
+    "CLAIM BASED": r"CLAIM BASED\s*([\s\S]*?)\s*(?=MECHANISM|$)"
+}
+
+
+def legacy_parse_key_value_pairs(text):
+    """The parser as it was before the single-scan grammar, kept as the reference"""
+    key_value_dict = {}
+    for key, pattern in LEGACY_PATTERNS.items():
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            key_value_dict[key] = match.group(1).strip()
+    for key, pattern in LEGACY_CHECKBOX_PATTERNS.items():
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            checked_values = re.findall(r"☑\s*([^\☐☑]+)", match.group(1))
+            if checked_values:
+                key_value_dict[key] = ", ".join(checked_values).strip()
+    return key_value_dict
+
+
+def load_page_texts(dirs):
+    page_texts = []
+    for directory in dirs:
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith(".pdf"):
+                with pdfplumber.open(os.path.join(directory, filename)) as pdf:
+                    for page_number, text in enumerate(PDFHandler.iter_page_texts(pdf), start=1):
+                        page_texts.append((f"{directory}{filename}#{page_number}", text))
+    return page_texts
+
+
+def best_of(func, text, runs):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dirs", nargs="+", default=["test/", "test2/", "INT_Diskon_Skema/"])
+    parser.add_argument("--repeats", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    page_texts = load_page_texts(args.dirs)
+    mismatches = [
+        name for name, text in page_texts
+        if PDFHandler.parse_key_value_pairs(text) != legacy_parse_key_value_pairs(text)
+    ]
+    print(f"verified {len(page_texts)} pages: {len(mismatches)} mismatches")
+    for name in mismatches:
+        print(f"  MISMATCH {name}")
+
+    # Header pages resolve every field early; label-free pages (outlet lists, tables)
+    # are the worst case because every field has to be searched for to the end
+    corpora = {
+        "all pages": "\n".join(text for _, text in page_texts),
+        "label-free pages": "\n".join(
+            text for _, text in page_texts if not PDFHandler.parse_key_value_pairs(text)
+        ),
+    }
+    for corpus_name, corpus in corpora.items():
+        if not corpus:
+            continue
+        print(f"\n{corpus_name}")
+        print(f"{'repeats':>8} {'chars':>10} {'legacy ms':>10} {'single-scan ms':>15} {'speedup':>8}")
+        for repeats in args.repeats:
+            text = "\n".join([corpus] * repeats)
+            assert PDFHandler.parse_key_value_pairs(text) == legacy_parse_key_value_pairs(text)
+            legacy = best_of(legacy_parse_key_value_pairs, text, args.runs)
+            single = best_of(PDFHandler.parse_key_value_pairs, text, args.runs)
+            print(f"{repeats:>8} {len(text):>10} {legacy * 1000:>10.2f} {single * 1000:>15.2f} "
+                  f"{legacy / single:>7.1f}x")
+
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Benchmark: full-page vs. region-targeted OCR on mixed native-text/scanned documents
+
+Usage: python -m benchmarks.bench_ocr_regions [--pages 20] [--pdf PATH ...]
+
+For every page that has content without a text layer, compares rasterizing and
+OCRing the whole page at 300 DPI (the page-mode fallback) with rasterizing and
+OCRing only the untexted regions at their per-region DPI (hybrid mode). Tesseract
+time is reported only when the tesseract binary is available; pixel counts are
+always reported, and Tesseract time scales with them.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import pdfplumber
+
+from benchmarks.synthetic_pdf import build_pdf, page_lines
+from infrastructure.pdf_handler import REGION_MAX_DPI, PDFHandler
+
+
+def stamp_pixels(width, height, seed):
+    """Random dark blobs on white, standing in for a scanned stamp or signature"""
+    rng = random.Random(seed)
+    pixels = bytearray(b"\xff" * (width * height))
+    for _ in range(width * height // 40):
+        pixels[rng.randrange(width * height)] = 0
+    return bytes(pixels)
+
+
+def write_mixed_pdf(path, page_count):
+    """Native-text pages, each with a scanned stamp (200 DPI, 150 x 80 pt)"""
+    pages = [page_lines(i, outlets_per_page=20) for i in range(page_count)]
+    images = {
+        i: [(400, 60, 150, 80, 417, 222, stamp_pixels(417, 222, i))]
+        for i in range(page_count)
+    }
+    with open(path, "wb") as f:
+        f.write(build_pdf(pages, images))
+    return path
+
+
+def tesseract_available():
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+def measure(pdf_path, run_ocr):
+    totals = {"page": [0, 0.0], "hybrid": [0, 0.0]}
+    with pdfplumber.open(pdf_path) as pdf:
+        raster_doc = PDFHandler.open_raster_document(pdf)
+        try:
+            for page in pdf.pages:
+                regions = PDFHandler.find_untexted_regions(page)
+                if not regions:
+                    continue
+                raster_page = raster_doc[page.page_number - 1]
+                strategies = {
+                    "page": [(page.bbox, REGION_MAX_DPI)],
+                    "hybrid": regions,
+                }
+                for name, crops in strategies.items():
+                    start = time.perf_counter()
+                    for bbox, dpi in crops:
+                        gray = PDFHandler.render_region(page, raster_page, bbox, dpi)
+                        totals[name][0] += gray.size
+                        if run_ocr:
+                            PDFHandler.ocr_grayscale(gray)
+                    totals[name][1] += time.perf_counter() - start
+        finally:
+            raster_doc.close()
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--pdf", nargs="*", default=[], help="Real PDFs to measure as well")
+    args = parser.parse_args()
+
+    run_ocr = tesseract_available()
+    label = "render + OCR s" if run_ocr else "render s"
+    if not run_ocr:
+        print("tesseract not found: timing rasterization only\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        documents = [write_mixed_pdf(os.path.join(tmp, "mixed.pdf"), args.pages)] + args.pdf
+        print(f"{'document':<40} {'mode':<7} {'Mpixels':>9} {label:>15}")
+        for pdf_path in documents:
+            totals = measure(pdf_path, run_ocr)
+            for name, (pixels, elapsed) in totals.items():
+                print(f"{os.path.basename(pdf_path)[:40]:<40} {name:<7} {pixels / 1e6:>9.2f} {elapsed:>15.3f}")
+            if totals["hybrid"][0]:
+                print(f"{'':<40} {'ratio':<7} {totals['page'][0] / totals['hybrid'][0]:>8.1f}x "
+                      f"{totals['page'][1] / max(totals['hybrid'][1], 1e-9):>14.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark: bytes written and wall time per 1,000 documents for each output sink
+
+Usage: python -m benchmarks.bench_output_sink [--documents 1000] [--customers 0 50]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from infrastructure.output_sink import JsonFileSink, NDJSONSink
+from infrastructure.pdf_handler import PDFHandler
+
+METADATA = {
+    "NOMOR": "CP20DJFAJ001-2599999",
+    "PRODUCT CATEGORY": "FLOUR",
+    "BRAND": "MILA",
+    "DISTRIBUTOR": "20DJFAJ001 - CV. Fajar Lestari",
+    "PERIODE CP": "06/03/2025 - 15/03/2025",
+}
+
+
+def directory_size(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+def run_sink(make_sink, pdf_paths, result):
+    start = time.perf_counter()
+    with make_sink() as sink:
+        for pdf_path in pdf_paths:
+            sink.write(pdf_path, result)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=1000)
+    parser.add_argument("--customers", type=int, nargs="+", default=[0, 50])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Distinct source files so every document gets its own hash
+        source_dir = os.path.join(tmp, "pdfs")
+        os.makedirs(source_dir)
+        pdf_paths = []
+        for i in range(args.documents):
+            pdf_path = os.path.join(source_dir, f"CP{i:06d}.pdf")
+            with open(pdf_path, "wb") as f:
+                f.write(b"%PDF-1.4 synthetic " + str(i).encode())
+            pdf_paths.append(pdf_path)
+
+        print(f"{'customers':>9} {'sink':<12} {'MB / 1k docs':>13} {'s / 1k docs':>12}")
+        for customers in args.customers:
+            result = PDFHandler.format_json_response(
+                METADATA, PDFHandler.build_customer_list(range(1000000, 1000000 + customers))
+            )
+            scale = 1000 / args.documents
+            sinks = {
+                "files": (lambda: JsonFileSink(os.path.join(tmp, f"files_{customers}")),
+                          lambda: directory_size(os.path.join(tmp, f"files_{customers}"))),
+                "ndjson": (lambda: NDJSONSink(os.path.join(tmp, f"out_{customers}.ndjson")),
+                           lambda: os.path.getsize(os.path.join(tmp, f"out_{customers}.ndjson"))),
+                "ndjson.gz": (lambda: NDJSONSink(os.path.join(tmp, f"out_{customers}.ndjson.gz")),
+                              lambda: os.path.getsize(os.path.join(tmp, f"out_{customers}.ndjson.gz"))),
+            }
+            for name, (make_sink, measure) in sinks.items():
+                elapsed = run_sink(make_sink, pdf_paths, result)
+                size_mb = measure() / (1024 * 1024)
+                print(f"{customers:>9} {name:<12} {size_mb * scale:>13.2f} {elapsed * scale:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
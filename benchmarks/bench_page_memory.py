@@ -0,0 +1,92 @@
+"""Benchmark: peak RSS of one 1,000-page PDF, pages held by pdf.pages vs. streamed and released
+
+Usage: python -m benchmarks.bench_page_memory [--pages 1000] [--max-growth-mb 200]
+
+The synthetic distributor listing has 40 outlet lines per page and a full-page
+scan every 50 pages (rendered at 300 DPI for the OCR fallback). "held" is the
+previous extraction loop: pages come from pdf.pages and keep their parsed layout
+objects until the document closes. "streamed" is PDFHandler.extract_page_range,
+which releases each page once parsed. Each mode runs in its own process so its
+peak RSS (ru_maxrss) is measured in isolation. With --max-growth-mb, the run
+fails if the streamed mode's peak RSS growth exceeds it, which makes the script
+usable as a regression check.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = ["held", "streamed"]
+SCAN_EVERY = 50
+
+
+def write_listing_pdf(path, page_count):
+    from benchmarks.bench_ocr_regions import stamp_pixels
+    from benchmarks.synthetic_pdf import build_pdf, page_lines
+
+    width, height = 827, 1170
+    pixels = stamp_pixels(width, height, 0)
+    images = {i: [(0, 0, 595, 842, width, height, pixels)] for i in range(SCAN_EVERY - 1, page_count, SCAN_EVERY)}
+    pages = [[] if i in images else page_lines(i) for i in range(page_count)]
+    with open(path, "wb") as f:
+        f.write(build_pdf(pages, images))
+
+
+def run_mode(mode, pdf_path):
+    """Runs one mode in this process; prints a JSON line with wall time, peak RSS growth and pages parsed"""
+    import pdfplumber
+
+    from infrastructure.pdf_handler import PDFHandler
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == "held":
+        with pdfplumber.open(pdf_path) as pdf:
+            parsed_pages = [PDFHandler.parse_page(page, text)
+                            for page, text in zip(pdf.pages, PDFHandler.iter_page_texts(pdf))]
+    else:
+        parsed_pages = PDFHandler.extract_page_range(pdf_path)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"seconds": elapsed, "peak_growth_mb": (peak - baseline) / 1024, "pages": len(parsed_pages)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--max-growth-mb", type=float, default=None,
+                        help="Fail if the streamed mode's peak RSS growth exceeds this")
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--pdf", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.pdf)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "listing.pdf")
+        write_listing_pdf(pdf_path, args.pages)
+        print(f"{args.pages}-page PDF, {os.path.getsize(pdf_path) / 2 ** 20:.1f} MB")
+        print(f"{'mode':<10} {'seconds':>8} {'peak RSS growth':>16}")
+        results = {}
+        for mode in args.modes:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_page_memory", "--mode", mode, "--pdf", pdf_path],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results[mode] = stats = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:<10} {stats['seconds']:>8.1f} {stats['peak_growth_mb']:>13.1f} MB")
+
+    streamed = results.get("streamed")
+    if args.max_growth_mb is not None and streamed and streamed["peak_growth_mb"] > args.max_growth_mb:
+        sys.exit(f"streamed peak RSS growth {streamed['peak_growth_mb']:.1f} MB exceeds {args.max_growth_mb} MB")
+
+
+if __name__ == "__main__":
+    main()
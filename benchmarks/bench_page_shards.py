@@ -0,0 +1,52 @@
+"""Benchmark: wall time of one large scanned PDF, whole-document vs. page-range sharding across workers
+
+Usage: python -m benchmarks.bench_page_shards [--pages 48] [--workers 1 2 4 8]
+
+The document is a synthetic scan (every page a single 200 DPI image, no text
+layer), so every page goes through the 300 DPI render, preprocessing and
+Tesseract. "whole" is the document as a single task, which no number of workers
+can speed up; "sharded" splits it into one page range per worker
+(BatchRunner(shard_pages=ceil(pages / workers))). Without the tesseract binary
+the OCR step fails fast and only rendering and preprocessing are timed.
+"""
+import argparse
+import math
+import os
+import tempfile
+import time
+
+from application.batch_runner import BatchRunner
+from benchmarks.bench_preprocess import write_scanned_pdf
+
+
+def run(pdf_path, workers, shard_pages):
+    # One worker would take the in-process serial path; a pool of two running a single task is the same
+    runner = BatchRunner(max_workers=max(workers, 2), shard_pages=shard_pages)
+    start = time.perf_counter()
+    items = list(runner.run([pdf_path]))
+    elapsed = time.perf_counter() - start
+    if not items[0].ok:
+        raise RuntimeError(items[0].error)
+    return elapsed, items[0].result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=48)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "scanned.pdf")
+        write_scanned_pdf(pdf_path, args.pages)
+        print(f"{args.pages}-page scanned PDF, {os.cpu_count()} CPU(s)")
+        whole_seconds, whole_result = run(pdf_path, 2, None)
+        print(f"{'workers':>7} {'whole s':>8} {'sharded s':>10} {'speedup':>8} {'same result':>12}")
+        for workers in args.workers:
+            sharded_seconds, sharded_result = run(pdf_path, workers, math.ceil(args.pages / workers))
+            print(f"{workers:>7} {whole_seconds:>8.2f} {sharded_seconds:>10.2f} "
+                  f"{whole_seconds / sharded_seconds:>7.2f}x {str(sharded_result == whole_result):>12}")
+
+
+if __name__ == "__main__":
+    main()
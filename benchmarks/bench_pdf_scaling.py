@@ -0,0 +1,64 @@
+"""Benchmark: PDF extraction time vs. page count on synthetic outlet-mapping PDFs
+
+Usage: python -m benchmarks.bench_pdf_scaling [--pages 1 10 50 100 250 500] [--legacy-max-pages 50]
+
+The single-pass engine should show a flat ms/page column (linear scaling). The
+legacy column re-runs the old per-page ``extract_customer_list`` call to show
+the quadratic behaviour it replaced; it is capped because it grows with pages².
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pdfplumber
+
+from benchmarks.synthetic_pdf import write_pdf
+from infrastructure.pdf_handler import PDFHandler
+
+
+def legacy_extract(pdf_path):
+    """Reproduces the old loop that reopened the PDF once per page"""
+    key_value_data = {}
+    customer_list = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            text = page.extract_text()
+            key_value_data.update(PDFHandler.parse_key_value_pairs(text))
+            customer_list = PDFHandler.extract_customer_list(pdf_path)
+    return PDFHandler.format_json_response(key_value_data, customer_list)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 50, 100, 250, 500])
+    parser.add_argument("--legacy-max-pages", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'pages':>6} {'single-pass s':>14} {'ms/page':>8} {'legacy s':>10} {'ms/page':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for page_count in args.pages:
+            pdf_path = write_pdf(os.path.join(tmp, f"synthetic_{page_count}.pdf"), page_count)
+            elapsed, result = timed(PDFHandler.extract_text_from_pdf, pdf_path)
+            assert len(result["list_customer"]) == page_count * 40
+
+            legacy = "-"
+            legacy_per_page = "-"
+            if page_count <= args.legacy_max_pages:
+                legacy_elapsed, legacy_result = timed(legacy_extract, pdf_path)
+                assert legacy_result == result
+                legacy = f"{legacy_elapsed:.3f}"
+                legacy_per_page = f"{legacy_elapsed * 1000 / page_count:.1f}"
+
+            print(f"{page_count:>6} {elapsed:>14.3f} {elapsed * 1000 / page_count:>8.1f} "
+                  f"{legacy:>10} {legacy_per_page:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Benchmark: peak memory and per-page latency of OCR preprocessing, legacy vs. buffer-reusing pipeline
+
+Usage: python -m benchmarks.bench_preprocess [--pages 10] [--max-side 1600]
+
+Covers everything before Tesseract on the scanned-page fallback at 300 DPI:
+legacy renders through pdfplumber's PIL image and allocates a fresh array per
+stage, the pipeline renders grayscale with pypdfium2 and reuses its buffers.
+The KTP rows time the sharpening pipeline on a 4032 x 3024 phone photo, at full
+resolution and downscaled first to --max-side. Each mode runs in its own process
+so its peak RSS (ru_maxrss) is measured in isolation.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = ["page-legacy", "page-pipeline", "ktp-legacy", "ktp-pipeline", "ktp-pipeline-downscaled"]
+
+
+def legacy_page(page):
+    import cv2
+    import numpy as np
+
+    img = np.array(page.to_image(resolution=300).original)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+    return cv2.threshold(blurred, 150, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+
+
+def legacy_ktp(image):
+    import cv2
+
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+    sharpened = cv2.addWeighted(gray, 1.5, blurred, -0.5, 0)
+    return cv2.threshold(sharpened, 150, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+
+
+def write_scanned_pdf(path, page_count):
+    """Pages that are a single full-page 200 DPI scan with no text layer"""
+    from benchmarks.bench_ocr_regions import stamp_pixels
+    from benchmarks.synthetic_pdf import build_pdf
+
+    width, height = 1654, 2339
+    pixels = stamp_pixels(width, height, 0)
+    images = {i: [(0, 0, 595, 842, width, height, pixels)] for i in range(page_count)}
+    with open(path, "wb") as f:
+        f.write(build_pdf([[] for _ in range(page_count)], images))
+
+
+def run_mode(mode, pdf_path, max_side, repeats):
+    """Runs one mode in this process; prints a JSON line with latency and peak RSS growth"""
+    import cv2
+    import numpy as np
+    import pdfplumber
+
+    from domain.preprocessing import PreprocessPipeline
+    from infrastructure.pdf_handler import PDFHandler
+
+    rng = np.random.default_rng(0)
+    photo = cv2.GaussianBlur(rng.integers(0, 256, (3024, 4032, 3), dtype=np.uint8), (9, 9), 0)
+
+    with pdfplumber.open(pdf_path) as pdf:
+        raster_doc = PDFHandler.open_raster_document(pdf)
+        pages = list(pdf.pages)
+        pages[0].bbox  # Parse the page tree before the baseline
+        pipeline = PreprocessPipeline(sharpen=mode.startswith("ktp"),
+                                      max_side=max_side if mode.endswith("downscaled") else None)
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        start = time.perf_counter()
+        if mode.startswith("page"):
+            items = len(pages)
+            for page in pages:
+                if mode == "page-legacy":
+                    legacy_page(page)
+                else:
+                    gray = PDFHandler.render_region(page, raster_doc[page.page_number - 1], page.bbox, 300)
+                    pipeline.run(gray, copy=False)
+        else:
+            items = repeats
+            preprocess = legacy_ktp if mode == "ktp-legacy" else pipeline.run
+            for _ in range(repeats):
+                preprocess(photo)
+        elapsed = time.perf_counter() - start
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        raster_doc.close()
+    print(json.dumps({"ms_per_item": elapsed / items * 1000, "peak_growth_mb": (peak - baseline) / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--max-side", type=int, default=1600)
+    parser.add_argument("--repeats", type=int, default=20, help="KTP photos per run")
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--pdf", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.pdf, args.max_side, args.repeats)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "scanned.pdf")
+        write_scanned_pdf(pdf_path, args.pages)
+        print(f"{'mode':<26} {'ms/item':>9} {'peak RSS growth':>16}")
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_preprocess", "--mode", mode, "--pdf", pdf_path,
+                 "--max-side", str(args.max_side), "--repeats", str(args.repeats)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            stats = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:<26} {stats['ms_per_item']:>9.2f} {stats['peak_growth_mb']:>13.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Benchmark: product-master lookups, legacy exact dict vs. ProductIndex (normalized hash + trigrams)
+
+Usage: python -m benchmarks.bench_product_index [--skus 100000] [--queries 20000]
+
+Builds a synthetic master of --skus distributor SKU names ("MILA FLOUR BAG @1KG"
+style: brand, product, pack and size), writes it as CSV and times loading it.
+Lookups are then timed per query class: the master spelling, the same name with
+other spacing and case, OCR confusions (0/O, 1/I/l, 5/S), a dropped or doubled
+character, and names that are not in the master. Hit rate is the share of
+queries resolved to the right product; misses are right when nothing matches.
+ProductIndex lookups are timed uncached (the per-index LRU is bypassed) and,
+in the last column, repeated through the LRU as recurring SKU names are.
+"""
+import argparse
+import csv
+import os
+import random
+import resource
+import tempfile
+import time
+
+from infrastructure.product_index import LOOKUP_CACHE_SIZE, ProductIndex
+
+BRANDS = ["MILA", "SEGITIGA", "CAKRA", "KUNCI", "LENCANA", "GARUDA", "BOGASARI", "ROSE", "PIRAMID", "TULIP",
+          "SANIA", "FILMA", "BIMOLI", "INDOMIE", "SEDAAP", "ABC", "SARIWANGI", "KAPAL", "MAWAR", "MELATI"]
+PRODUCTS = ["FLOUR", "TEPUNG TERIGU", "MINYAK GORENG", "GULA PASIR", "BERAS", "MIE GORENG", "KECAP MANIS",
+            "SAOS SAMBAL", "TEH CELUP", "KOPI BUBUK", "SUSU KENTAL", "MARGARIN", "BISKUIT", "SIRUP", "GARAM"]
+PACKS = ["BAG", "POUCH", "BOX", "BTL", "JRG", "SACHET", "CTN", "PCS"]
+SIZES = ["@{}G".format(n) for n in (100, 200, 250, 400, 500, 750, 900)] + \
+        ["@{}KG".format(n) for n in (1, 2, 5, 10, 25)] + ["@{}ML".format(n) for n in (250, 600, 1000, 2000)]
+OCR_CONFUSIONS = {"O": "0", "I": "l", "S": "5", "B": "8", "0": "O", "1": "I"}
+
+
+def build_master(count, rng):
+    names = set()
+    while len(names) < count:
+        variant = rng.randint(1, 40)
+        names.add(f"{rng.choice(BRANDS)} {rng.choice(PRODUCTS)} V{variant} {rng.choice(PACKS)} {rng.choice(SIZES)}")
+    return [(name, 1000000 + i) for i, name in enumerate(sorted(names))]
+
+
+def respace(name, rng):
+    return "".join(c.lower() if rng.random() < 0.3 else c for c in name.replace(" @", "@").replace(" ", "  ", 1))
+
+
+def ocr_noise(name, rng):
+    positions = [i for i, c in enumerate(name) if c in OCR_CONFUSIONS]
+    chars = list(name)
+    for i in rng.sample(positions, min(2, len(positions))):
+        chars[i] = OCR_CONFUSIONS[chars[i]]
+    return "".join(chars)
+
+
+def typo(name, rng):
+    i = rng.randrange(3, len(name) - 1)
+    return name[:i] + name[i + 1:] if rng.random() < 0.5 else name[:i] + name[i] + name[i:]
+
+
+def time_lookups(lookup, queries):
+    """Returns (microseconds per lookup, results)"""
+    start = time.perf_counter()
+    results = [lookup(query) for query in queries]
+    return (time.perf_counter() - start) / len(queries) * 1e6, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--skus", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    master = build_master(args.skus, rng)
+    legacy = {name: product_id for name, product_id in master}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "products.csv")
+        with open(csv_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["SKU", "M_PRODUCT_ID"])
+            writer.writerows(master)
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        index = ProductIndex.from_file(csv_path)
+        build_seconds = time.perf_counter() - start
+        rss_growth = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024
+    print(f"{len(index):,} SKUs indexed in {build_seconds:.2f} s, peak RSS growth {rss_growth:.0f} MB")
+
+    sample = rng.sample(master, min(args.queries, len(master)))
+    unknown = [(f"{rng.choice(BRANDS)} UNKNOWN ITEM {i} {rng.choice(SIZES)}", 0) for i in range(len(sample))]
+    classes = {
+        "exact": [(name, product_id) for name, product_id in sample],
+        "spacing/case": [(respace(name, rng), product_id) for name, product_id in sample],
+        "ocr noise": [(ocr_noise(name, rng), product_id) for name, product_id in sample],
+        "typo": [(typo(name, rng), product_id) for name, product_id in sample],
+        "not in master": unknown,
+    }
+
+    print(f"{'queries':<14} {'legacy us':>10} {'hit rate':>9} {'index us':>9} {'hit rate':>9} {'cached us':>10}")
+    for label, pairs in classes.items():
+        queries = [query for query, _ in pairs]
+        expected = [product_id for _, product_id in pairs]
+        legacy_us, legacy_ids = time_lookups(lambda query: legacy.get(query, 0), queries)
+        index_us, matches = time_lookups(index._match, queries)
+        index_ids = [0 if match is None else match.product_id for match in matches]
+        index.match.cache_clear()
+        for query in queries[:LOOKUP_CACHE_SIZE]:
+            index.match(query)
+        cached_us, _ = time_lookups(index.match, queries[:LOOKUP_CACHE_SIZE])
+        legacy_hits = sum(a == b for a, b in zip(legacy_ids, expected)) / len(expected)
+        index_hits = sum(a == b for a, b in zip(index_ids, expected)) / len(expected)
+        print(f"{label:<14} {legacy_us:>10.2f} {legacy_hits:>8.1%} {index_us:>9.2f} {index_hits:>8.1%} {cached_us:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
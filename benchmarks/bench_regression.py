@@ -0,0 +1,185 @@
+"""Benchmark: golden-output regression and throughput check over the bundled PDF corpus
+
+Usage: python -m benchmarks.bench_regression [--repeat 3] [--max-slowdown 0.15] [--record] [--update-golden]
+
+Runs OCRService.process_pdf (no result cache) over every PDF in test/, test2/
+and INT_Diskon_Skema/ and compares each result with its checked-in golden JSON
+in benchmarks/golden/<folder>/<pdf name>.json. The corpus is processed --repeat
+times and the fastest pass is kept. With --record, its docs/sec, pages/sec,
+peak RSS and per-stage wall time are appended as one line to --history
+(benchmarks/history.jsonl, untracked: timings only compare on one machine).
+
+The run fails if any output differs from its golden file, or if pages/sec drops
+more than --max-slowdown below the median of the last --baseline-runs passing
+runs recorded on the same host; without recorded runs only outputs are checked. A change that is meant to alter the output
+regenerates the golden files with --update-golden, and the diff of
+benchmarks/golden/ shows exactly what changed.
+"""
+import argparse
+import difflib
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+from application.ocr_service import OCRService
+from infrastructure.instrumentation import merge_metrics, record_document
+
+CORPUS_DIRS = ["test", "test2", "INT_Diskon_Skema"]
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCHMARK_DIR)
+GOLDEN_DIR = os.path.join(BENCHMARK_DIR, "golden")
+HISTORY_PATH = os.path.join(BENCHMARK_DIR, "history.jsonl")
+
+
+def corpus_paths():
+    """(folder, file name) of every corpus PDF, in a stable order"""
+    return [(folder, filename)
+            for folder in CORPUS_DIRS
+            for filename in sorted(os.listdir(os.path.join(PROJECT_DIR, folder)))
+            if filename.endswith(".pdf")]
+
+
+def golden_path(folder, filename):
+    return os.path.join(GOLDEN_DIR, folder, filename + ".json")
+
+
+def to_json(result):
+    # Same serialization as JsonFileSink, so golden files read like the real output
+    return json.dumps(result, ensure_ascii=False, indent=4)
+
+
+def run_corpus(service, documents):
+    """(wall seconds, {document: result}, merged stage metrics) of one pass over the corpus"""
+    results = {}
+    metrics = []
+    start = time.perf_counter()
+    for folder, filename in documents:
+        with record_document() as (recorder, _):
+            results[folder, filename] = service.process_pdf(os.path.join(PROJECT_DIR, folder, filename))
+        metrics.append(recorder.as_dict())
+    return time.perf_counter() - start, results, merge_metrics(metrics)
+
+
+def compare_golden(results):
+    """Messages for every result that differs from (or has no) golden file"""
+    failures = []
+    for (folder, filename), result in results.items():
+        path = golden_path(folder, filename)
+        if not os.path.exists(path):
+            failures.append(f"{folder}/{filename}: no golden file (run with --update-golden)")
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            expected = f.read()
+        actual = to_json(result)
+        if actual != expected:
+            diff = difflib.unified_diff(expected.splitlines(), actual.splitlines(), "golden", "actual", lineterm="")
+            failures.append(f"{folder}/{filename}: output differs from golden\n" + "\n".join(list(diff)[:40]))
+    return failures
+
+
+def write_golden(results):
+    for (folder, filename), result in results.items():
+        path = golden_path(folder, filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(to_json(result))
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def read_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def baseline_pages_per_sec(history, host, runs):
+    """Median pages/sec of the last passing runs on this host, or None without any"""
+    previous = [entry["pages_per_sec"] for entry in history if entry["host"] == host and entry["passed"]]
+    return statistics.median(previous[-runs:]) if previous else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the corpus; the fastest is kept")
+    parser.add_argument("--max-slowdown", type=float, default=0.15,
+                        help="Fail if pages/sec falls more than this fraction below the baseline")
+    parser.add_argument("--baseline-runs", type=int, default=5,
+                        help="Passing runs on this host whose median pages/sec is the baseline")
+    parser.add_argument("--history", default=HISTORY_PATH, help="JSON-lines file of recorded runs")
+    parser.add_argument("--record", action="store_true", help="Append this run to --history")
+    parser.add_argument("--update-golden", action="store_true",
+                        help="Rewrite the golden files from this run's output instead of comparing")
+    args = parser.parse_args()
+
+    documents = corpus_paths()
+    service = OCRService()
+    passes = [run_corpus(service, documents) for _ in range(max(args.repeat, 1))]
+    seconds, results, metrics = min(passes, key=lambda run: run[0])
+    # Every pass must produce the same output, or the golden comparison means nothing
+    failures = [f"{folder}/{filename}: output changed between passes"
+                for run in passes for (folder, filename), result in run[1].items()
+                if result != results[folder, filename]]
+
+    if args.update_golden:
+        write_golden(results)
+        print(f"Golden files written for {len(results)} documents to {GOLDEN_DIR}")
+    else:
+        failures.extend(compare_golden(results))
+
+    pages = metrics["counters"].get("pages", 0)
+    host = f"{platform.node()}/{os.cpu_count()}cpu"
+    entry = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "host": host,
+        "python": platform.python_version(),
+        "documents": len(documents),
+        "pages": pages,
+        "seconds": round(seconds, 3),
+        "docs_per_sec": round(len(documents) / seconds, 3),
+        "pages_per_sec": round(pages / seconds, 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "stages_s": {name: stats["wall_s"] for name, stats in sorted(metrics["stages"].items())},
+    }
+
+    history = read_history(args.history)
+    baseline = baseline_pages_per_sec(history, host, args.baseline_runs)
+    if baseline is not None and entry["pages_per_sec"] < baseline * (1 - args.max_slowdown):
+        failures.append(f"throughput regressed: {entry['pages_per_sec']:.2f} pages/s vs. baseline "
+                        f"{baseline:.2f} pages/s (allowed slowdown {args.max_slowdown:.0%})")
+
+    print(f"{len(documents)} documents, {pages} pages in {seconds:.2f} s (best of {len(passes)}): "
+          f"{entry['docs_per_sec']:.2f} docs/s, {entry['pages_per_sec']:.2f} pages/s, "
+          f"peak RSS {entry['peak_rss_mb']:.0f} MB")
+    if baseline is not None:
+        print(f"baseline {baseline:.2f} pages/s ({entry['pages_per_sec'] / baseline - 1:+.1%})")
+    for name, wall in sorted(entry["stages_s"].items(), key=lambda item: -item[1])[:8]:
+        print(f"  {name:<24} {wall:>8.3f} s")
+
+    entry["passed"] = not failures
+    if args.record:
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    if failures:
+        print("\n".join(failures), file=sys.stderr)
+        sys.exit(f"{len(failures)} regression(s)")
+    if not args.update_golden:
+        print("outputs identical to golden")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark: startup cost (import time, wall time, peak RSS) per run type
+
+Usage: python -m benchmarks.bench_startup [--pdf PATH] [--excel PATH] [--ktp PATH]
+
+Each run type executes in a fresh interpreter: it imports OCRService, builds it
+the way main.py does and processes one input. "pdf-eager" reproduces the old
+startup that always constructed EasyOCRAdapter before processing a PDF.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.synthetic_pdf import write_pdf
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["easyocr", "torch", "cv2", "pytesseract", "pandas", "numpy"]
+
+DRIVER = r"""
+import json, resource, sys, time
+start = time.perf_counter()
+from application.ocr_service import OCRService
+import_time = time.perf_counter() - start
+
+mode, path = sys.argv[1], sys.argv[2]
+error = None
+try:
+    if mode == "pdf-eager":
+        from infrastructure.easyocr_adapter import EasyOCRAdapter
+        service = OCRService(EasyOCRAdapter())
+    else:
+        service = OCRService()
+    if mode in ("pdf", "pdf-eager"):
+        service.process_pdf(path)
+    elif mode == "excel":
+        service.process_excel(path)
+    elif mode == "ktp":
+        service.process_ktp(path)
+except Exception as e:
+    error = f"{type(e).__name__}: {e}"
+
+max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform != "darwin":
+    max_rss *= 1024  # Linux reports KiB, macOS bytes
+print(json.dumps({
+    "import_s": import_time,
+    "total_s": time.perf_counter() - start,
+    "max_rss_mb": max_rss / (1024 * 1024),
+    "loaded": [m for m in %(heavy)r if m in sys.modules],
+    "error": error,
+}))
+""" % {"heavy": HEAVY_MODULES}
+
+
+def run_mode(mode, path):
+    output = subprocess.run(
+        [sys.executable, "-c", DRIVER, mode, path],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def make_excel(path):
+    """Writes a small workbook, or returns None if openpyxl is unavailable"""
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        return None
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["ID OUTLET", "NAMA OUTLET", "DISC %"])
+    for i in range(1000):
+        sheet.append([1000000 + i, f"TOKO {i}", 5.04])
+    workbook.save(path)
+    return path
+
+
+def make_ktp(path):
+    """Writes a blank KTP-sized image, or returns None if OpenCV is unavailable"""
+    try:
+        import cv2
+        import numpy as np
+    except ImportError:
+        return None
+    image = np.full((638, 1011, 3), 255, dtype=np.uint8)
+    cv2.putText(image, "NIK : 3171234567890001", (40, 120), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2)
+    cv2.imwrite(path, image)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdf")
+    parser.add_argument("--excel")
+    parser.add_argument("--ktp")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = {
+            "pdf": args.pdf or write_pdf(os.path.join(tmp, "startup.pdf"), 1),
+            "excel": args.excel or make_excel(os.path.join(tmp, "startup.xlsx")),
+            "ktp": args.ktp or make_ktp(os.path.join(tmp, "startup.png")),
+        }
+        inputs["pdf-eager"] = inputs["pdf"]
+
+        print(f"{'run':<10} {'import s':>9} {'total s':>8} {'max RSS MB':>11}  heavy modules loaded")
+        for mode in ["pdf", "excel", "ktp", "pdf-eager"]:
+            if inputs[mode] is None:
+                print(f"{mode:<10} skipped (input could not be generated)")
+                continue
+            stats = run_mode(mode, os.path.abspath(inputs[mode]))
+            line = (f"{mode:<10} {stats['import_s']:>9.3f} {stats['total_s']:>8.3f} "
+                    f"{stats['max_rss_mb']:>11.1f}  {', '.join(stats['loaded']) or '-'}")
+            if stats["error"]:
+                line += f"  [{stats['error']}]"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Benchmark: full-page table detection vs. header-located, cropped tier-table detection
+
+Usage: python -m benchmarks.bench_tables [DIR ...]   (default: test/ test2/ INT_Diskon_Skema/)
+
+For every PDF, times page.extract_tables() over each full page (the approach of
+pdf_handler1.process_tables) against TableEngine.extract_tier_tables, which locates
+tier tables by their header words and detects tables only in the cropped region.
+Page text is extracted beforehand and not timed, as the pipeline has it already.
+"""
+import argparse
+import os
+import time
+
+import pdfplumber
+
+from infrastructure.table_engine import TableEngine
+
+DEFAULT_DIRS = ["test/", "test2/", "INT_Diskon_Skema/"]
+
+
+def measure(pdf_path):
+    """Returns (full-page seconds, scoped seconds, tier rows found)"""
+    full_page = scoped = 0.0
+    rows = 0
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            text = page.extract_text()
+
+            start = time.perf_counter()
+            page.extract_tables()
+            full_page += time.perf_counter() - start
+
+            start = time.perf_counter()
+            tables = TableEngine.extract_tier_tables(page, text)
+            scoped += time.perf_counter() - start
+            rows += sum(len(table_rows) for table_rows in tables.values())
+    return full_page, scoped, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("dirs", nargs="*", default=DEFAULT_DIRS)
+    args = parser.parse_args()
+
+    print(f"{'document':<60} {'full page':>10} {'scoped':>10} {'speedup':>8} {'rows':>5}")
+    total_full = total_scoped = 0.0
+    for directory in args.dirs:
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith(".pdf"):
+                continue
+            full_page, scoped, rows = measure(os.path.join(directory, filename))
+            total_full += full_page
+            total_scoped += scoped
+            print(f"{filename[:60]:<60} {full_page * 1000:>8.1f}ms {scoped * 1000:>8.1f}ms "
+                  f"{full_page / scoped if scoped else float('inf'):>7.1f}x {rows:>5}")
+    print(f"{'total':<60} {total_full * 1000:>8.1f}ms {total_scoped * 1000:>8.1f}ms "
+          f"{total_full / total_scoped if total_scoped else float('inf'):>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
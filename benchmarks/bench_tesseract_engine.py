@@ -0,0 +1,93 @@
+"""Benchmark: per-page OCR latency, pytesseract (process per page) vs. a warm in-process tesserocr handle
+
+Usage: python -m benchmarks.bench_tesseract_engine [--pages 10] [--lang eng] [--psm 3] [--pdf PATH ...]
+
+Pages of a synthetic CP document (native text, so the rendered pages carry
+real words) are rendered at 300 DPI and binarized once; only the Tesseract
+call is timed. "first" includes loading the language models, which pytesseract
+pays on every page and tesserocr only once per worker. Backends that are not
+installed (tesserocr, or the tesseract binary pytesseract runs) are skipped.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import pdfplumber
+
+from benchmarks.synthetic_pdf import build_pdf, page_lines
+from domain.preprocessing import PDF_PIPELINE
+from infrastructure.pdf_handler import PDFHandler
+from infrastructure.tesseract_engine import BACKENDS, TesseractEngine, tesserocr_available
+
+
+def backend_available(backend):
+    if backend == "tesserocr":
+        return tesserocr_available()
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+def binarized_pages(pdf_path, limit):
+    """Page images as ocr_grayscale hands them to Tesseract"""
+    images = []
+    with pdfplumber.open(pdf_path) as pdf:
+        raster_doc = PDFHandler.open_raster_document(pdf)
+        try:
+            for page in pdf.pages[:limit]:
+                gray = PDFHandler.render_region(page, raster_doc[page.page_number - 1], page.bbox, 300)
+                images.append(PDF_PIPELINE.run(gray))
+        finally:
+            raster_doc.close()
+    return images
+
+
+def time_backend(backend, images, lang, psm):
+    """(first-page ms, median ms of the other pages, characters recognized)"""
+    engine = TesseractEngine(lang, psm, backend=backend)
+    try:
+        latencies, characters = [], 0
+        for image in images:
+            start = time.perf_counter()
+            characters += len(engine.image_to_string(image))
+            latencies.append((time.perf_counter() - start) * 1000)
+    finally:
+        engine.close()
+    return latencies[0], statistics.median(latencies[1:] or latencies), characters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--lang", default="eng", help="Tesseract language(s), e.g. eng+ind")
+    parser.add_argument("--psm", type=int, default=3)
+    parser.add_argument("--pdf", nargs="*", default=[], help="Real PDFs to measure as well")
+    args = parser.parse_args()
+
+    backends = [backend for backend in BACKENDS if backend_available(backend)]
+    for backend in BACKENDS:
+        if backend not in backends:
+            print(f"{backend} not available: skipped")
+    if not backends:
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic = os.path.join(tmp, "synthetic.pdf")
+        with open(synthetic, "wb") as f:
+            f.write(build_pdf([page_lines(i, outlets_per_page=20) for i in range(args.pages)]))
+        print(f"{'document':<32} {'backend':<12} {'pages':>5} {'first ms':>9} {'ms/page':>8} {'chars':>7}")
+        for pdf_path in [synthetic] + args.pdf:
+            images = binarized_pages(pdf_path, args.pages)
+            for backend in backends:
+                first, median, characters = time_backend(backend, images, args.lang, args.psm)
+                print(f"{os.path.basename(pdf_path)[:32]:<32} {backend:<12} {len(images):>5} "
+                      f"{first:>9.1f} {median:>8.1f} {characters:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Load test: latency percentiles and throughput of the HTTP extraction service
+
+Usage: python -m benchmarks.load_test [--url http://127.0.0.1:8080] [--concurrency 1 2 4 8]
+                                      [--requests 40] [--endpoint extract|jobs] [--pdf PATH ...]
+
+Without --url a service is started on a free local port (server.py --no-cache, so
+every request is a real extraction) and stopped afterwards. Each concurrency level
+runs that many clients, each posting PDFs back to back over a keep-alive
+connection. Rejected (429) requests are counted, not retried. The "jobs" endpoint
+submits asynchronously and polls for the result.
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_PDF_DIRS = ["test/", "test2/"]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_healthy(host, port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            connection = http.client.HTTPConnection(host, port, timeout=1)
+            connection.request("GET", "/health")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("service did not become healthy")
+
+
+def run_client(host, port, endpoint, payloads, count, latencies, statuses, lock):
+    connection = http.client.HTTPConnection(host, port, timeout=600)
+    for index in range(count):
+        body = payloads[index % len(payloads)]
+        start = time.perf_counter()
+        connection.request("POST", f"/{endpoint}/pdf", body=body)
+        response = connection.getresponse()
+        payload = json.loads(response.read())
+        status = response.status
+        if endpoint == "jobs" and status == 202:
+            while payload["status"] in ("queued", "running"):
+                time.sleep(0.02)
+                connection.request("GET", f"/jobs/{payload['job_id']}")
+                response = connection.getresponse()
+                payload = json.loads(response.read())
+            status = 200 if payload["status"] == "done" else 500
+        elapsed = time.perf_counter() - start
+        with lock:
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                latencies.append(elapsed)
+    connection.close()
+
+
+def run_level(host, port, endpoint, payloads, concurrency, total):
+    latencies, statuses, lock = [], {}, threading.Lock()
+    per_client = max(1, total // concurrency)
+    threads = [
+        threading.Thread(target=run_client,
+                         args=(host, port, endpoint, payloads, per_client, latencies, statuses, lock))
+        for _ in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] if latencies else float("nan")
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else float("nan")
+    print(f"{concurrency:>11} {len(latencies) / elapsed:>9.2f} {p50 * 1000:>9.0f} {p99 * 1000:>9.0f} "
+          f"{statuses.get(429, 0):>5} {sum(v for k, v in statuses.items() if k not in (200, 429)):>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=None, help="Running service to test (default: start one)")
+    parser.add_argument("--workers", type=int, default=None, help="Workers for the started service")
+    parser.add_argument("--queue-size", type=int, default=64, help="Queue size for the started service")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--requests", type=int, default=40, help="Requests per concurrency level")
+    parser.add_argument("--endpoint", choices=["extract", "jobs"], default="extract")
+    parser.add_argument("--pdf", nargs="+", default=None, help="PDFs to upload (default: test/ and test2/)")
+    args = parser.parse_args()
+
+    pdf_paths = args.pdf or [os.path.join(directory, filename) for directory in DEFAULT_PDF_DIRS
+                             for filename in sorted(os.listdir(directory)) if filename.endswith(".pdf")]
+    payloads = []
+    for path in pdf_paths:
+        with open(path, "rb") as f:
+            payloads.append(f.read())
+
+    server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        host, port = "127.0.0.1", free_port()
+        command = [sys.executable, "server.py", "--port", str(port), "--no-cache",
+                   "--queue-size", str(args.queue_size)]
+        if args.workers:
+            command += ["--workers", str(args.workers)]
+        server = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    try:
+        wait_until_healthy(host, port)
+        print(f"{len(payloads)} PDF(s), {args.requests} requests per level, /{args.endpoint}/pdf")
+        print(f"{'concurrency':>11} {'docs/sec':>9} {'p50 ms':>9} {'p99 ms':>9} {'429s':>5} {'errors':>6}")
+        for concurrency in args.concurrency:
+            run_level(host, port, args.endpoint, payloads, concurrency, args.requests)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Writes synthetic CP-style PDFs for benchmarks (no third-party dependencies)"""
+import zlib
+
+HEADER_LINES = [
+    "CONFIRMATION PROMOTION",
+    "NOMOR: CP20DJFAJ001-2599999",
+    "PRODUCT CATEGORY : FLOUR REF DOC: APP-KC1102-20DJFAJ001-25-00000001",
+    "BRAND : MILA REF CP NO : -",
+    "CHANNEL : GT PERIODE CP: 06/03/2025 - 15/03/2025",
+    "REGION : KC0011 - BMW HO JAKARTA GROUP OUTLET :",
+    "SUB REGION : KC001102 - LAMPUNG",
+    "DISTRIBUTOR : 20DJFAJ001 - CV. Fajar Lestari",
+    "PROMO TYPE : 31. DISCOUNT PROMO COMPENSATION :",
+    "SUB PROMO TYPE : 31D - DEAL KHUSUS",
+    "MECHANISM: '1. Strata Discount",
+    "DISCOUNT PROMOTION",
+]
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _content_stream(lines, image_names=()):
+    ops = []
+    for name, (x, y, width, height) in image_names:
+        ops.append(f"q {width} 0 0 {height} {x} {y} cm /{name} Do Q")
+    ops.extend(["BT", "/F1 9 Tf", "11 TL", "40 800 Td"])
+    for line in lines:
+        ops.append(f"({_escape(line)}) Tj T*")
+    ops.append("ET")
+    return "\n".join(ops).encode("latin-1")
+
+
+def page_lines(page_number, outlets_per_page=40, first_outlet_id=1000000):
+    """Returns the text lines drawn on one synthetic page"""
+    lines = list(HEADER_LINES) if page_number == 0 else [f"LAMPIRAN OUTLET {page_number + 1}"]
+    base = first_outlet_id + page_number * outlets_per_page
+    lines.extend(f"ID OUTLET : {base + i}" for i in range(outlets_per_page))
+    return lines
+
+
+def build_pdf(pages, images=None):
+    """Builds PDF bytes from a list of pages, each a list of text lines
+
+    images maps a page index to a list of (x, y, width, height, pixel_width,
+    pixel_height, gray_bytes) tuples drawn as 8-bit grayscale image XObjects
+    (PDF coordinates, origin bottom-left).
+    """
+    images = images or {}
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = add(b"")  # Placeholder, filled once all kids are known
+    kids = []
+    for page_index, lines in enumerate(pages):
+        image_names = []
+        xobjects = b""
+        for number, (x, y, width, height, pixel_width, pixel_height, pixels) in enumerate(
+                images.get(page_index, ()), start=1):
+            data = zlib.compress(pixels)
+            image_id = add(
+                b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray "
+                b"/BitsPerComponent 8 /Filter /FlateDecode /Length %d >>\nstream\n%s\nendstream"
+                % (pixel_width, pixel_height, len(data), data)
+            )
+            image_names.append((f"Im{number}", (x, y, width, height)))
+            xobjects += b"/Im%d %d 0 R " % (number, image_id)
+
+        stream = _content_stream(lines, image_names)
+        content_id = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        kids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> /XObject << %s>> >> /Contents %d 0 R >>"
+            % (pages_id, font_id, xobjects, content_id)
+        ))
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids), len(kids)
+    )
+    catalog_id = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog_id, xref_offset
+    )
+    return bytes(out)
+
+
+def write_pdf(path, page_count, outlets_per_page=40):
+    """Writes a synthetic outlet-mapping PDF with the given number of pages"""
+    pages = [page_lines(i, outlets_per_page) for i in range(page_count)]
+    with open(path, "wb") as f:
+        f.write(build_pdf(pages))
+    return path
@@ -1,13 +1,69 @@
+import threading
+
 import cv2
 import numpy as np
 
+
+class PreprocessPipeline:
+    """Grayscale -> (downscale) -> blur -> (sharpen) -> Otsu binarization on reusable buffers
+
+    Every stage writes into a preallocated buffer through OpenCV's dst= outputs, so
+    repeated calls on same-sized images allocate nothing but the result. Buffers are
+    kept per thread, which makes one pipeline safe to share across a thread pool.
+    """
+
+    def __init__(self, sharpen=True, max_side=None):
+        self.sharpen = sharpen
+        # Downscale first so that every later stage runs on the smaller image
+        self.max_side = max_side
+        self._local = threading.local()
+
+    def _buffer(self, name, shape):
+        """Returns this thread's work buffer for a stage, reallocated only when the size changes"""
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None:
+            buffers = self._local.buffers = {}
+        buffer = buffers.get(name)
+        if buffer is None or buffer.shape != shape:
+            buffer = buffers[name] = np.empty(shape, dtype=np.uint8)
+        return buffer
+
+    def run(self, image, copy=True):
+        """Binarizes a BGR or grayscale image
+
+        With copy=False the result is a pooled buffer that the next call on the same
+        thread overwrites; use it only when the image is consumed right away.
+        """
+        if image.ndim == 3:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=self._buffer("gray", image.shape[:2]))
+        else:
+            gray = image
+
+        height, width = gray.shape
+        if self.max_side and max(height, width) > self.max_side:
+            scale = self.max_side / max(height, width)
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            gray = cv2.resize(gray, size, dst=self._buffer("small", (size[1], size[0])),
+                              interpolation=cv2.INTER_AREA)
+
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0, dst=self._buffer("blurred", gray.shape))
+        if self.sharpen:
+            # Unsharp mask, written back over the blur it was computed from
+            blurred = cv2.addWeighted(gray, 1.5, blurred, -0.5, 0, dst=blurred)
+
+        thresh = np.empty(gray.shape, dtype=np.uint8) if copy else self._buffer("thresh", gray.shape)
+        cv2.threshold(blurred, 150, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=thresh)
+        return thresh
+
+
+# KTP photos are sharpened before EasyOCR; rendered PDF pages are only blurred
+KTP_PIPELINE = PreprocessPipeline(sharpen=True)
+PDF_PIPELINE = PreprocessPipeline(sharpen=False)
+
+
 class ImagePreprocessor:
     """Preprocessing images to improve OCR accuracy"""
-    
+
     @staticmethod
     def preprocess(image):
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-        sharpened = cv2.addWeighted(gray, 1.5, blurred, -0.5, 0)
-        _, thresh = cv2.threshold(sharpened, 150, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        return thresh
\ No newline at end of file
+        return KTP_PIPELINE.run(image)
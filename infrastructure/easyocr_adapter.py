@@ -1,19 +1,76 @@
-import easyocr
-import cv2
-from domain.preprocessing import ImagePreprocessor
+from concurrent.futures import ThreadPoolExecutor
+
 
 class EasyOCRAdapter:
     """Adapter to handle OCR with EasyOCR"""
     
-    def __init__(self):
+    def __init__(self, max_side=None):
+        # Imported here: easyocr pulls in torch and loads its models, which only KTP runs need
+        import easyocr
+        from domain.preprocessing import KTP_PIPELINE, PreprocessPipeline
+
         self.reader = easyocr.Reader(['id', 'en'])
+        # max_side downscales large photos before preprocessing, when the detector doesn't need full resolution
+        self.preprocessor = KTP_PIPELINE if max_side is None else PreprocessPipeline(sharpen=True, max_side=max_side)
 
     def read_text_from_image(self, image):
         """Perform OCR on an image"""
         return " ".join(self.reader.readtext(image, detail=0))
 
+    def load_ktp_image(self, image_path):
+        """Decode and preprocess one KTP image"""
+        import cv2
+
+        image = cv2.imread(image_path)
+        if image is None:
+            raise ValueError(f"Cannot read image: {image_path}")
+        return self.preprocessor.run(image)
+
     def process_ktp(self, image_path):
         """Extract text from KTP (Image)"""
-        image = cv2.imread(image_path)
-        processed_img = ImagePreprocessor.preprocess(image)
-        return self.read_text_from_image(processed_img)
\ No newline at end of file
+        processed_img = self.load_ktp_image(image_path)
+        return self.read_text_from_image(processed_img)
+
+    def process_ktp_batch(self, image_paths, batch_size=8, workers=None, chunk_size=None, target_size=None):
+        """Extract text from many KTP images with batched inference, in input order
+
+        Images are decoded and preprocessed on a thread pool (OpenCV releases the
+        GIL) while the previous chunk is being recognized. EasyOCR's batched API
+        needs equally sized images, so each chunk is grouped by shape, unless
+        target_size=(width, height) resizes every image to one size.
+        """
+        image_paths = list(image_paths)
+        chunk_size = chunk_size or batch_size * 4
+        chunks = [image_paths[i:i + chunk_size] for i in range(0, len(image_paths), chunk_size)]
+        texts = []
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Decode the next chunk while the current one runs through the recognizer
+            pending = [executor.submit(self.load_ktp_image, path) for path in chunks[0]] if chunks else []
+            for index in range(len(chunks)):
+                images = [future.result() for future in pending]
+                if index + 1 < len(chunks):
+                    pending = [executor.submit(self.load_ktp_image, path) for path in chunks[index + 1]]
+                texts.extend(self._read_batch(images, batch_size, target_size))
+        return texts
+
+    def _read_batch(self, images, batch_size, target_size):
+        """Runs readtext_batched over same-sized groups and restores the input order"""
+        if target_size is not None:
+            groups = {target_size: list(range(len(images)))}
+        else:
+            groups = {}
+            for position, image in enumerate(images):
+                groups.setdefault(image.shape[:2], []).append(position)
+
+        texts = [None] * len(images)
+        for size, positions in groups.items():
+            options = {}
+            if target_size is not None:
+                options = {"n_width": size[0], "n_height": size[1]}
+            results = self.reader.readtext_batched(
+                [images[position] for position in positions], detail=0, batch_size=batch_size, **options
+            )
+            for position, result in zip(positions, results):
+                texts[position] = " ".join(result)
+        return texts
@@ -1,4 +1,7 @@
-import pandas as pd
+import os
+
+EXCEL_CHUNK_ROWS = 10000
+
 
 class ExcelHandler:
     """Handles Excel to JSON conversion"""
@@ -6,5 +9,110 @@ class ExcelHandler:
     @staticmethod
     def extract_data_from_excel(excel_path):
         """Read Excel file and convert it to JSON"""
+        import pandas as pd
+
         df = pd.read_excel(excel_path)
-        return df.to_dict(orient="records")
\ No newline at end of file
+        return df.to_dict(orient="records")
+
+    @staticmethod
+    def iter_excel_records(excel_path, sheets=None, chunk_size=EXCEL_CHUNK_ROWS, dtypes=None):
+        """Streams (sheet name, list of records) chunks from the given sheets (default: all)
+
+        Rows are read one at a time from a read-only workbook, so memory stays bounded by
+        chunk_size however long the sheet is. Each chunk is converted in bulk with the same
+        parser pd.read_excel uses; types are inferred per chunk, so pass dtypes
+        ({column: dtype}) to pin columns whose type could differ between chunks (e.g. an
+        integer column with blanks in only some chunks). Legacy .xls workbooks, which
+        openpyxl cannot open, are read whole by pandas (with xlrd) and then chunked.
+        """
+        if os.path.splitext(excel_path)[1].lower() == ".xls":
+            yield from ExcelHandler.iter_xls_records(excel_path, sheets, chunk_size, dtypes)
+            return
+
+        import openpyxl
+
+        workbook = openpyxl.load_workbook(excel_path, read_only=True, data_only=True)
+        try:
+            for sheet_name in sheets or workbook.sheetnames:
+                sheet = workbook[sheet_name]
+                # Read-only sheets may carry stale dimensions; let the row iterator find them
+                sheet.reset_dimensions()
+                rows = sheet.iter_rows(values_only=True)
+                columns = ExcelHandler.column_names(next(rows, ()))
+                if not columns:
+                    continue
+
+                chunk = []
+                for values in ExcelHandler.sheet_rows(rows, len(columns)):
+                    chunk.append(values)
+                    if len(chunk) == chunk_size:
+                        yield sheet_name, ExcelHandler.records_from_rows(chunk, columns, dtypes)
+                        chunk = []
+                if chunk:
+                    yield sheet_name, ExcelHandler.records_from_rows(chunk, columns, dtypes)
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def iter_xls_records(excel_path, sheets=None, chunk_size=EXCEL_CHUNK_ROWS, dtypes=None):
+        """iter_excel_records for a legacy .xls workbook; memory is bounded by the workbook, not chunk_size"""
+        import pandas as pd
+
+        frames = pd.read_excel(excel_path, sheet_name=list(sheets) if sheets else None, dtype=dtypes)
+        for sheet_name, frame in frames.items():
+            for start in range(0, len(frame), chunk_size):
+                yield sheet_name, frame.iloc[start:start + chunk_size].to_dict(orient="records")
+
+    @staticmethod
+    def sheet_rows(rows, width):
+        """Converted data rows cut to the header's width
+
+        Blank rows are kept as pd.read_excel keeps them, except trailing ones: they are
+        held back until a row with data shows they are not at the end of the sheet.
+        """
+        pending_blanks = 0
+        for row in rows:
+            values = [ExcelHandler.convert_cell(value) for value in row[:width]]
+            if all(value == "" for value in values):
+                pending_blanks += 1
+                continue
+            for _ in range(pending_blanks):
+                yield [""] * width
+            pending_blanks = 0
+            yield values
+
+    @staticmethod
+    def column_names(header):
+        """Header cells to column names, the way pd.read_excel names them"""
+        header = list(header)
+        while header and header[-1] in (None, ""):
+            header.pop()
+        names = []
+        seen = {}
+        for index, value in enumerate(header):
+            name = f"Unnamed: {index}" if value in (None, "") else str(value)
+            # Duplicate names become "name.1", "name.2", ...
+            if name in seen:
+                seen[name] += 1
+                name = f"{name}.{seen[name]}"
+            else:
+                seen[name] = 0
+            names.append(name)
+        return names
+
+    @staticmethod
+    def convert_cell(value):
+        """Matches pandas' openpyxl cell conversion: blanks to "", integral floats to int"""
+        if value is None:
+            return ""
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        return value
+
+    @staticmethod
+    def records_from_rows(rows, columns, dtypes=None):
+        """Parses a chunk of raw rows in bulk (NA detection, type inference, dtypes) into records"""
+        from pandas.io.parsers import TextParser
+
+        frame = TextParser(rows, names=columns, header=None, dtype=dtypes, skip_blank_lines=False).read()
+        return frame.to_dict(orient="records")
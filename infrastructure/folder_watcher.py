@@ -0,0 +1,152 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+# inotify(7) event bits: a file finished being written, or was moved in (e.g. an atomic rename)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, name length
+
+DEFAULT_POLL_INTERVAL = 2.0
+
+
+class FolderWatcher:
+    """Reports files created or changed in a set of directories (not recursive)
+
+    On Linux the kernel's inotify, reached through ctypes, reports a file the moment
+    its writer closes it. Elsewhere, or if inotify is unavailable, the directories are
+    rescanned every poll_interval and a file is reported once its size and mtime have
+    held still for one interval, so files still being copied are not picked up.
+    """
+
+    def __init__(self, directories, suffixes=(".pdf",), poll_interval=DEFAULT_POLL_INTERVAL, use_inotify=True):
+        self.directories = [os.path.abspath(directory) for directory in directories]
+        self.suffixes = tuple(suffix.lower() for suffix in suffixes)
+        self.poll_interval = poll_interval
+        self._fd = None
+        self._watches = {}
+        self._seen = {}
+        self._unsettled = {}
+        self._next_poll = 0.0
+        if use_inotify:
+            self._fd = self._open_inotify()
+
+    @property
+    def mode(self):
+        return "inotify" if self._fd is not None else "polling"
+
+    def _open_inotify(self):
+        """inotify descriptor watching every directory, or None to fall back to polling"""
+        if not hasattr(os, "O_CLOEXEC"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            init, add_watch = libc.inotify_init1, libc.inotify_add_watch
+        except (OSError, AttributeError):
+            return None
+        fd = init(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        for directory in self.directories:
+            wd = add_watch(fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO)
+            if wd < 0:
+                os.close(fd)
+                return None
+            self._watches[wd] = directory
+        return fd
+
+    def _matches(self, filename):
+        return filename.lower().endswith(self.suffixes)
+
+    def _listing(self):
+        """path -> (size, mtime_ns) of every matching file in the watched directories"""
+        files = {}
+        for directory in self.directories:
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if not self._matches(entry.name):
+                    continue
+                try:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                except FileNotFoundError:
+                    continue
+        return files
+
+    def scan(self):
+        """Every matching file present now, sorted; also the baseline later changes are reported against"""
+        self._seen = self._listing()
+        self._next_poll = time.monotonic() + self.poll_interval
+        return sorted(self._seen)
+
+    def wait(self, timeout):
+        """Paths created or changed since the last call, waiting up to timeout seconds for one"""
+        if self._fd is not None:
+            return self._read_events(timeout)
+        delay = self._next_poll - time.monotonic()
+        if delay > 0:
+            if delay > timeout:
+                time.sleep(timeout)
+                return []
+            time.sleep(delay)
+        self._next_poll = time.monotonic() + self.poll_interval
+        return self._poll()
+
+    def _poll(self):
+        listing = self._listing()
+        changed = []
+        unsettled = {}
+        for path, signature in listing.items():
+            if self._seen.get(path) == signature:
+                continue
+            if self._unsettled.get(path) == signature:
+                # Unchanged since the previous scan: the writer is done
+                self._seen[path] = signature
+                changed.append(path)
+            else:
+                unsettled[path] = signature
+        self._unsettled = unsettled
+        for path in set(self._seen) - set(listing):
+            del self._seen[path]
+        return sorted(changed)
+
+    def _read_events(self, timeout):
+        readable, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+        if not readable:
+            return []
+        changed = []
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                # The kernel dropped events; a rescan finds whatever they were about
+                return sorted(set(changed) | set(self._listing()))
+            filename = os.fsdecode(name)
+            if wd in self._watches and self._matches(filename):
+                changed.append(os.path.join(self._watches[wd], filename))
+        return sorted(set(changed))
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
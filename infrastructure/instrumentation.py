@@ -0,0 +1,199 @@
+import contextvars
+import cProfile
+import csv
+import heapq
+import json
+import marshal
+import os
+import time
+from contextlib import contextmanager
+
+# Recorder of the document being processed in this context; None when instrumentation is off
+_current_recorder = contextvars.ContextVar("stage_recorder", default=None)
+
+
+class StageRecorder:
+    """Accumulates calls, wall time and CPU time per pipeline stage, plus counters, for one document"""
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+
+    def add(self, name, wall, cpu):
+        totals = self.stages.setdefault(name, [0, 0.0, 0.0])
+        totals[0] += 1
+        totals[1] += wall
+        totals[2] += cpu
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def as_dict(self):
+        return {
+            "stages": {
+                name: {"calls": calls, "wall_s": round(wall, 6), "cpu_s": round(cpu, 6)}
+                for name, (calls, wall, cpu) in self.stages.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+
+@contextmanager
+def stage(name):
+    """Times the enclosed block as one call of a stage; a no-op outside record_document"""
+    recorder = _current_recorder.get()
+    if recorder is None:
+        yield
+        return
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield
+    finally:
+        recorder.add(name, time.perf_counter() - wall_start, time.process_time() - cpu_start)
+
+
+def count(name, amount=1):
+    """Adds to a per-document counter (pages, OCR fallbacks, errors...)"""
+    recorder = _current_recorder.get()
+    if recorder is not None:
+        recorder.count(name, amount)
+
+
+def merge_metrics(metrics_list):
+    """Sums StageRecorder.as_dict() metrics recorded in several processes (e.g. one document's page ranges)"""
+    stages = {}
+    counters = {}
+    for metrics in metrics_list:
+        for name, stats in metrics["stages"].items():
+            totals = stages.setdefault(name, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0})
+            totals["calls"] += stats["calls"]
+            totals["wall_s"] = round(totals["wall_s"] + stats["wall_s"], 6)
+            totals["cpu_s"] = round(totals["cpu_s"] + stats["cpu_s"], 6)
+        for name, value in metrics["counters"].items():
+            counters[name] = counters.get(name, 0) + value
+    return {"stages": stages, "counters": counters}
+
+
+@contextmanager
+def record_document(profile=False):
+    """Records the stages run in this context; yields the recorder, and the profiler if requested"""
+    recorder = StageRecorder()
+    profiler = cProfile.Profile() if profile else None
+    token = _current_recorder.set(recorder)
+    try:
+        with stage("total"):
+            if profiler is None:
+                yield recorder, None
+            else:
+                profiler.enable()
+                try:
+                    yield recorder, profiler
+                finally:
+                    profiler.disable()
+    finally:
+        _current_recorder.reset(token)
+
+
+def profile_bytes(profiler):
+    """Serializes a profiler's stats in the .prof format read by pstats and snakeviz"""
+    profiler.create_stats()
+    return marshal.dumps(profiler.stats)
+
+
+class BatchReport:
+    """Collects per-document stage metrics for a batch and writes them as JSON and CSV
+
+    When profile_top is set, only the cProfile dumps of the slowest documents are
+    kept in profile_dir.
+    """
+
+    def __init__(self, profile_dir=None, profile_top=0):
+        self.documents = []
+        self.profile_dir = profile_dir
+        self.profile_top = profile_top
+        # Min-heap of (wall time, sequence, file, profile) for the slowest documents
+        self._profiles = []
+
+    def add(self, pdf_path, metrics, ok=True, profile=None):
+        metrics = metrics or {"stages": {}, "counters": {}}
+        document = {"file": os.path.basename(pdf_path), "ok": ok, **metrics}
+        self.documents.append(document)
+
+        if profile is not None and self.profile_top:
+            entry = (self.wall_time(document), len(self.documents), document["file"], profile)
+            if len(self._profiles) < self.profile_top:
+                heapq.heappush(self._profiles, entry)
+            else:
+                heapq.heappushpop(self._profiles, entry)
+        return document
+
+    @staticmethod
+    def add_stage(document, name, wall, cpu):
+        """Adds a stage measured outside the worker (e.g. serialization) to a document"""
+        totals = document["stages"].setdefault(name, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0})
+        totals["calls"] += 1
+        totals["wall_s"] = round(totals["wall_s"] + wall, 6)
+        totals["cpu_s"] = round(totals["cpu_s"] + cpu, 6)
+
+    @staticmethod
+    def wall_time(document):
+        return document["stages"].get("total", {}).get("wall_s", 0.0)
+
+    def totals(self):
+        """Stage totals over the whole batch, slowest stage first"""
+        totals = {}
+        for document in self.documents:
+            for name, stats in document["stages"].items():
+                entry = totals.setdefault(name, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0})
+                entry["calls"] += stats["calls"]
+                entry["wall_s"] += stats["wall_s"]
+                entry["cpu_s"] += stats["cpu_s"]
+        return {
+            name: {"calls": entry["calls"], "wall_s": round(entry["wall_s"], 6), "cpu_s": round(entry["cpu_s"], 6)}
+            for name, entry in sorted(totals.items(), key=lambda item: -item[1]["wall_s"])
+        }
+
+    def counter_totals(self):
+        """Counters summed over the whole batch"""
+        totals = {}
+        for document in self.documents:
+            for name, value in document["counters"].items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def pages_reused_ratio(self):
+        """Share of the pages of extracted documents that were reused from the page cache"""
+        counters = self.counter_totals()
+        return round(counters.get("pages_reused", 0) / counters["pages"], 4) if counters.get("pages") else 0.0
+
+    def write(self, report_dir, slowest=10):
+        """Writes stage_report.json, stage_report.csv and the kept profiles; returns the JSON path"""
+        os.makedirs(report_dir, exist_ok=True)
+        by_time = sorted(self.documents, key=self.wall_time, reverse=True)
+        json_path = os.path.join(report_dir, "stage_report.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "documents": self.documents,
+                "totals": self.totals(),
+                "counters": self.counter_totals(),
+                "pages_reused_ratio": self.pages_reused_ratio(),
+                "slowest": [{"file": doc["file"], "wall_s": self.wall_time(doc)} for doc in by_time[:slowest]],
+            }, f, ensure_ascii=False, indent=4)
+
+        # One row per document and stage, for spreadsheets and pandas
+        with open(os.path.join(report_dir, "stage_report.csv"), "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["file", "ok", "stage", "calls", "wall_s", "cpu_s"])
+            for document in self.documents:
+                for name, stats in document["stages"].items():
+                    writer.writerow([document["file"], document["ok"], name,
+                                     stats["calls"], stats["wall_s"], stats["cpu_s"]])
+
+        if self._profiles:
+            profile_dir = self.profile_dir or os.path.join(report_dir, "profiles")
+            os.makedirs(profile_dir, exist_ok=True)
+            for _, _, filename, profile in self._profiles:
+                with open(os.path.join(profile_dir, f"{filename}.prof"), "wb") as f:
+                    f.write(profile)
+        return json_path
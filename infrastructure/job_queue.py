@@ -0,0 +1,183 @@
+import os
+import sqlite3
+import time
+from collections import namedtuple
+
+from infrastructure.result_cache import file_digest
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_DELAY = 30  # seconds before the first retry; doubled for every further attempt
+
+# queued -> running -> done; a failed attempt goes back to queued until max_attempts, then to dead.
+# A queued job is superseded when its file changes again before it ran.
+JOB_STATUSES = ("queued", "running", "done", "dead", "superseded")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    doc_hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    enqueued_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    UNIQUE (path, doc_hash)
+);
+CREATE INDEX IF NOT EXISTS jobs_due ON jobs (status, available_at);
+"""
+
+Job = namedtuple("Job", ["id", "path", "doc_hash", "attempts", "enqueued_at"])
+
+
+class JobQueue:
+    """Durable queue of documents to extract, one row per file version, in a local SQLite database
+
+    A file version is its path plus the SHA-256 of its bytes: a new file, or new
+    contents under an existing name, becomes a job; seeing the current bytes again (a
+    rescan after a restart, a touched file) does not. An earlier version coming back
+    (e.g. A -> B -> A, a previous upload restored) runs again, since the output of the
+    version in between would otherwise stand. Every state change is committed before
+    it is acted on, so after a crash or restart no job is lost and none that finished
+    is run again.
+    """
+
+    def __init__(self, db_path, max_attempts=DEFAULT_MAX_ATTEMPTS, retry_delay=DEFAULT_RETRY_DELAY):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Autocommit; multi-statement changes run in explicit transactions
+        self.db = sqlite3.connect(db_path, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def enqueue(self, path):
+        """Queues a file version unless it is already known; returns the new job id or None"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        # Size and mtime of the latest version unchanged: no need to hash the file again
+        if self._latest(path)[1:] == (stat.st_size, stat.st_mtime_ns):
+            return None
+
+        doc_hash = file_digest(path)
+        now = time.time()
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            cursor = self.db.execute(
+                "INSERT OR IGNORE INTO jobs (path, doc_hash, size, mtime_ns, enqueued_at, available_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (path, doc_hash, stat.st_size, stat.st_mtime_ns, now, now),
+            )
+            status = None
+            if cursor.rowcount:
+                job_id = cursor.lastrowid
+            else:
+                job_id, status = self.db.execute("SELECT id, status FROM jobs WHERE path = ? AND doc_hash = ?",
+                                                 (path, doc_hash)).fetchone()
+                if self._latest(path)[0] == doc_hash:
+                    # Same bytes under a new mtime (touched, copied over itself): remember the new stat only
+                    self.db.execute("UPDATE jobs SET size = ?, mtime_ns = ? WHERE id = ?",
+                                    (stat.st_size, stat.st_mtime_ns, job_id))
+                    return None
+                if status == "running":
+                    # Back while its job is still running: that run stands, as the latest version again
+                    self.db.execute("UPDATE jobs SET size = ?, mtime_ns = ?, enqueued_at = ? WHERE id = ?",
+                                    (stat.st_size, stat.st_mtime_ns, now, job_id))
+                else:
+                    # An earlier version is back: run it again as a new job
+                    self.db.execute(
+                        "UPDATE jobs SET size = ?, mtime_ns = ?, status = 'queued', attempts = 0, error = NULL, "
+                        "enqueued_at = ?, available_at = ?, started_at = NULL, finished_at = NULL WHERE id = ?",
+                        (stat.st_size, stat.st_mtime_ns, now, now, job_id),
+                    )
+            # Older versions of the file that have not run yet would only be overwritten
+            self.db.execute("UPDATE jobs SET status = 'superseded', finished_at = ? "
+                            "WHERE path = ? AND status = 'queued' AND id != ?", (now, path, job_id))
+        return None if status == "running" else job_id
+
+    def _latest(self, path):
+        """(doc_hash, size, mtime_ns) of the most recently queued version of a path, or Nones"""
+        row = self.db.execute("SELECT doc_hash, size, mtime_ns FROM jobs WHERE path = ? "
+                              "ORDER BY enqueued_at DESC, id DESC LIMIT 1", (path,)).fetchone()
+        return row or (None, None, None)
+
+    def recover(self):
+        """Requeues jobs left running by a process that stopped mid-document; returns how many
+
+        The interrupted run counts as an attempt, so a document that keeps taking the
+        process down ends up dead-lettered instead of being retried forever.
+        """
+        now = time.time()
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            self.db.execute("UPDATE jobs SET status = 'dead', finished_at = ?, error = 'interrupted' "
+                            "WHERE status = 'running' AND attempts >= ?", (now, self.max_attempts))
+            return self.db.execute("UPDATE jobs SET status = 'queued', available_at = ? WHERE status = 'running'",
+                                   (now,)).rowcount
+
+    def claim(self):
+        """Marks the oldest due job running and returns it, or None when nothing is due
+
+        A job whose file already has one running waits for it: two versions of a file
+        never run at once, so they reach the sink in the order they were queued.
+        """
+        now = time.time()
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            row = self.db.execute(
+                "SELECT id, path, doc_hash, attempts, enqueued_at FROM jobs "
+                "WHERE status = 'queued' AND available_at <= ? "
+                "AND path NOT IN (SELECT path FROM jobs WHERE status = 'running') ORDER BY id LIMIT 1", (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.db.execute("UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ? "
+                            "WHERE id = ?", (now, row[0]))
+        job_id, path, doc_hash, attempts, enqueued_at = row
+        return Job(job_id, path, doc_hash, attempts + 1, enqueued_at)
+
+    def complete(self, job_id):
+        self.db.execute("UPDATE jobs SET status = 'done', finished_at = ?, error = NULL WHERE id = ?",
+                        (time.time(), job_id))
+
+    def fail(self, job_id, error, retry=True):
+        """Records a failed attempt; returns the job's new status ("queued" to retry, or "dead")"""
+        now = time.time()
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            attempts = self.db.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+            if retry and attempts < self.max_attempts:
+                self.db.execute("UPDATE jobs SET status = 'queued', error = ?, available_at = ? WHERE id = ?",
+                                (error, now + self.retry_delay * 2 ** (attempts - 1), job_id))
+                return "queued"
+            self.db.execute("UPDATE jobs SET status = 'dead', error = ?, finished_at = ? WHERE id = ?",
+                            (error, now, job_id))
+            return "dead"
+
+    def next_due(self):
+        """When the earliest queued job becomes due (epoch seconds), or None if none is queued"""
+        return self.db.execute("SELECT MIN(available_at) FROM jobs WHERE status = 'queued'").fetchone()[0]
+
+    def counts(self):
+        """Number of jobs per status"""
+        return dict(self.db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+
+    def dead_letters(self):
+        """(path, attempts, last error) of every dead-lettered job"""
+        return self.db.execute("SELECT path, attempts, error FROM jobs WHERE status = 'dead' ORDER BY id").fetchall()
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
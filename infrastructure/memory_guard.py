@@ -0,0 +1,44 @@
+import gc
+import os
+
+# Per-process RSS ceiling in bytes (None: unlimited), set by the worker initializer
+_memory_limit = None
+
+
+class MemoryLimitExceeded(MemoryError):
+    """Raised when a worker's resident memory stays above its ceiling"""
+
+
+def set_memory_limit(limit_bytes):
+    """Sets (or with None, lifts) the RSS ceiling of this process"""
+    global _memory_limit
+    _memory_limit = limit_bytes
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None where /proc is not available"""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def check_memory():
+    """Fails the current document if the process is over its memory ceiling
+
+    Called between pages, once the finished page's caches have been released: garbage
+    left by reference cycles is collected first, and only memory still held after
+    that counts. Failing the document keeps the worker (and the rest of the batch)
+    alive where growing further would end with the OOM killer.
+    """
+    if _memory_limit is None:
+        return
+    rss = current_rss()
+    if rss is None or rss <= _memory_limit:
+        return
+    gc.collect()
+    rss = current_rss()
+    if rss > _memory_limit:
+        raise MemoryLimitExceeded(f"worker RSS {rss / 2 ** 20:.0f} MB is over its "
+                                  f"{_memory_limit / 2 ** 20:.0f} MB ceiling")
@@ -0,0 +1,187 @@
+import gzip
+import json
+import os
+
+from domain.customer_list import expand_customers, pack_customers
+from infrastructure.result_cache import file_digest
+
+
+def input_subdirs(input_dirs):
+    """Absolute input directory -> the name its documents are filed under, when there is more than one
+
+    Raises ValueError for input directories sharing a name.
+    """
+    subdirs = {}
+    if input_dirs and len(input_dirs) > 1:
+        for input_dir in input_dirs:
+            input_dir = os.path.abspath(input_dir)
+            name = os.path.basename(input_dir)
+            if name in subdirs.values():
+                raise ValueError(f"Input directories named {name!r} would write to the same output")
+            subdirs[input_dir] = name
+    return subdirs
+
+
+def source_name(subdirs, pdf_path):
+    """A document's file name, under its input directory's name given input_subdirs() of several"""
+    filename = os.path.basename(pdf_path)
+    subdir = subdirs.get(os.path.dirname(os.path.abspath(pdf_path)))
+    return os.path.join(subdir, filename) if subdir else filename
+
+
+class JsonFileSink:
+    """Writes one pretty-printed JSON file per document (the original ocr_results/ layout)
+
+    Given more than one input directory, each one's documents are written to a
+    subdirectory named after it, so same-named PDFs in two of them do not overwrite
+    each other; input directories sharing a name are rejected.
+    """
+
+    def __init__(self, output_dir, input_dirs=None):
+        self.output_dir = output_dir
+        self.errors = []
+        # Absolute input directory -> its output subdirectory
+        self.subdirs = input_subdirs(input_dirs)
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _output_name(self, pdf_path):
+        """Path of a document's output, relative to output_dir and without the .json suffix"""
+        return source_name(self.subdirs, pdf_path)
+
+    def is_written(self, pdf_path):
+        """Per-file output is always rewritten"""
+        return False
+
+    def write(self, pdf_path, result):
+        output_path = os.path.join(self.output_dir, f"{self._output_name(pdf_path)}.json")
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(expand_customers(result), f, ensure_ascii=False, indent=4)
+
+    def write_error(self, pdf_path, error):
+        self.errors.append({"file": self._output_name(pdf_path), "error": error})
+
+    def close(self):
+        if self.errors:
+            with open(os.path.join(self.output_dir, "batch_errors.json"), "w", encoding="utf-8") as f:
+                json.dump(self.errors, f, ensure_ascii=False, indent=4)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class NDJSONSink:
+    """Streams one compact JSON record per document into an append-only NDJSON (or .gz) file
+
+    Every record carries the SHA-256 of the source PDF and is flushed as soon as it
+    is written, so a run that crashes can be resumed by skipping documents whose
+    hash is already in the file. Error records are kept but do not count as written,
+    so failed documents are retried on resume. With pack_customers, list_customer is
+    written in columnar form for bulk loading: {"encoding": "base64-int64le",
+    "count": n, "c_bpartner_id": "<base64>"}, the other (always zero) fields omitted.
+    Given more than one input directory, a record's source is prefixed with its
+    input directory's name, as JsonFileSink names its subdirectories.
+    """
+
+    def __init__(self, path, compress=None, pack_customers=False, input_dirs=None):
+        self.path = path
+        self.compress = path.endswith(".gz") if compress is None else compress
+        self.pack_customers = pack_customers
+        # Absolute input directory -> the name prefixed to its records' source
+        self.subdirs = input_subdirs(input_dirs)
+        self.written_hashes = set()
+        # Record source -> hash of its last written record
+        self._latest_hashes = {}
+        self._digests = {}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if os.path.exists(path):
+            self._recover()
+        self._file = self._open("at")
+
+    def _open(self, mode, path=None):
+        encoding = None if "b" in mode else "utf-8"
+        if self.compress:
+            return gzip.open(path or self.path, mode, encoding=encoding)
+        return open(path or self.path, mode, encoding=encoding)
+
+    def _recover(self):
+        """Loads already-written hashes and drops a record cut short by a crash"""
+        records = []
+        intact = True
+        try:
+            # Read as bytes: a record cut off inside a multi-byte character is not valid UTF-8,
+            # and only complete lines are decoded
+            with self._open("rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        intact = False
+                        break
+                    records.append(line)
+        except (EOFError, gzip.BadGzipFile):
+            # Gzip stream killed mid-member; keep every complete line before the cut
+            intact = False
+
+        for line in records:
+            record = json.loads(line)
+            if "result" in record:
+                self.written_hashes.add(record["doc_hash"])
+                self._latest_hashes[record["source"]] = record["doc_hash"]
+
+        if not intact:
+            # Rewrite the intact prefix so later appends follow a clean stream
+            tmp_path = f"{self.path}.tmp"
+            with self._open("wb", tmp_path) as f:
+                f.writelines(records)
+            os.replace(tmp_path, self.path)
+
+    def _digest(self, pdf_path):
+        # Keyed on size and mtime too: a watched file can change between writes
+        stat = os.stat(pdf_path)
+        key = (pdf_path, stat.st_size, stat.st_mtime_ns)
+        if key not in self._digests:
+            self._digests[key] = file_digest(pdf_path)
+        return self._digests[key]
+
+    def is_written(self, pdf_path):
+        """True if this document's bytes were already written, and not since followed by other contents
+
+        A file that goes back to earlier contents (A -> B -> A) is not written: B's
+        record would otherwise remain the file's latest.
+        """
+        doc_hash = self._digest(pdf_path)
+        latest = self._latest_hashes.get(source_name(self.subdirs, pdf_path), doc_hash)
+        return doc_hash in self.written_hashes and latest == doc_hash
+
+    def _append(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._file.flush()
+
+    def write(self, pdf_path, result):
+        doc_hash = self._digest(pdf_path)
+        result = pack_customers(result) if self.pack_customers else expand_customers(result)
+        source = source_name(self.subdirs, pdf_path)
+        self._append({"source": source, "doc_hash": doc_hash, "result": result})
+        self.written_hashes.add(doc_hash)
+        self._latest_hashes[source] = doc_hash
+
+    def write_error(self, pdf_path, error):
+        try:
+            doc_hash = self._digest(pdf_path)
+        except OSError:
+            doc_hash = None
+        self._append({"source": source_name(self.subdirs, pdf_path), "doc_hash": doc_hash, "error": error})
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,61 @@
+import hashlib
+
+from pdfminer.pdftypes import PDFObjRef, PDFStream
+from pdfminer.psparser import PSKeyword, PSLiteral
+
+# Back-references up the page tree; following them would hash the whole document into every page
+SKIPPED_KEYS = {"Parent", "P", "StructParents"}
+
+
+def page_fingerprint(page, memo):
+    """Content fingerprint of a pdfplumber page, from the raw PDF objects that draw it
+
+    Covers the page geometry, its content streams and everything its resources
+    reach (fonts, images, form XObjects), hashed as stored in the file without
+    decoding or rendering. Two pages with the same fingerprint extract to the same
+    text, OCR and tables. memo maps object ids to digests and is shared between
+    pages of one document, so fonts and images used on many pages are hashed once.
+    """
+    page_obj = page.page_obj
+    digest = hashlib.sha256()
+    digest.update(repr((page_obj.mediabox, page_obj.cropbox, page_obj.rotate)).encode("utf-8"))
+    for stream in page_obj.contents:
+        digest.update(_object_digest(stream, memo))
+    digest.update(_object_digest(page_obj.resources, memo))
+    return digest.hexdigest()
+
+
+def _object_digest(obj, memo):
+    """Digest of a PDF object and everything it references"""
+    if isinstance(obj, PDFObjRef):
+        if obj.objid in memo:
+            return memo[obj.objid]
+        # Placeholder for reference cycles (e.g. annotations pointing back at their page)
+        memo[obj.objid] = b"cycle:%d" % obj.objid
+        memo[obj.objid] = _object_digest(obj.resolve(), memo)
+        return memo[obj.objid]
+
+    digest = hashlib.sha256()
+    if isinstance(obj, dict):
+        digest.update(b"dict")
+        for key in sorted(obj, key=str):
+            if key not in SKIPPED_KEYS:
+                digest.update(str(key).encode("utf-8"))
+                digest.update(_object_digest(obj[key], memo))
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b"list")
+        for item in obj:
+            digest.update(_object_digest(item, memo))
+    elif isinstance(obj, PDFStream):
+        digest.update(b"stream")
+        digest.update(_object_digest(obj.attrs, memo))
+        # Raw (still encoded) bytes are enough to tell streams apart; a stream decoded
+        # earlier by the parser only has its decoded bytes left
+        digest.update(obj.rawdata if obj.rawdata is not None else obj.get_data())
+    elif isinstance(obj, (PSLiteral, PSKeyword)):
+        digest.update(b"name" + str(obj.name).encode("utf-8"))
+    elif isinstance(obj, bytes):
+        digest.update(b"bytes" + obj)
+    else:
+        digest.update(repr(obj).encode("utf-8"))
+    return digest.digest()
@@ -1,105 +1,559 @@
 import os
 import pdfplumber
-import pytesseract
-import cv2
-import numpy as np
 import re
 import json
+import hashlib
+from collections import deque
+
+from domain.customer_list import CustomerList
+from infrastructure.instrumentation import count, stage
+from infrastructure.memory_guard import check_memory
+from infrastructure.page_fingerprint import page_fingerprint
+from infrastructure.product_index import DEFAULT_PRODUCTS, MIN_CONFIDENCE, OCR_FOLD_TABLE, ProductIndex
+from infrastructure.table_engine import TIER_TABLE_SETTINGS, TIER_TABLES, TableEngine
+from infrastructure.tesseract_engine import DEFAULT_LANG, DEFAULT_PSM, get_engine
+
+# Field grammar for key-value pairs: label -> (value rule, terminator label)
+#   "line":  value runs from the colon to the end of the line          (LABEL : (.*))
+#   "until": value runs up to the terminator label on the same line    (LABEL : (.*?) TERMINATOR)
+#   "block": value runs up to the terminator label or the end of text  (LABEL : ([\s\S]*?) TERMINATOR|$)
+KEY_VALUE_FIELDS = {
+    "NOMOR": ("line", None),
+    "PRODUCT CATEGORY": ("until", "REF DOC"),
+    "BRAND": ("until", "REF CP NO"),
+    "CHANNEL": ("until", "PERIODE CP"),
+    "REGION": ("until", "GROUP OUTLET"),
+    "SUB REGION": ("line", None),
+    "DISTRIBUTOR": ("line", None),
+    "PROMO TYPE": ("until", "COMPENSATION"),
+    "SUB PROMO TYPE": ("line", None),
+    "MECHANISM": ("block", "DISCOUNT PROMOTION"),
+    "REF DOC": ("line", None),
+    "REF CP NO": ("line", None),
+    "PERIODE CP": ("line", None),
+    "GROUP OUTLET": ("until", "SUB REGION"),
+    "COMPENSATION": ("until", "SUB PROMO TYPE")
+}
+
+# Checkbox-based values (no colon): label -> terminator label; the value runs up to
+# the terminator or the end of the text and only checked (☑) options are kept
+CHECKBOX_FIELDS = {
+    "COST CATEGORY": "TIPE CP",
+    "TIPE CP": "TIPE CLAIM",
+    "TIPE CLAIM": "CLAIM BASED",
+    "CLAIM BASED": "MECHANISM"
+}
+
+
+def _collect_labels():
+    """Every label the parser looks for: field labels and their terminators, longest first"""
+    labels = set(KEY_VALUE_FIELDS) | set(CHECKBOX_FIELDS) | set(CHECKBOX_FIELDS.values())
+    labels.update(terminator for _, terminator in KEY_VALUE_FIELDS.values() if terminator)
+    labels = sorted(labels, key=len, reverse=True)
+    for label in labels:
+        # Each scan step reports one label per offset, so no label may start another one
+        if any(other != label and other.startswith(label) for other in labels):
+            raise ValueError(f"Label {label!r} is a prefix of another label")
+    return labels
+
+
+LABELS = _collect_labels()
+LONGEST_LABEL = len(LABELS[0])
+
+# A plain literal alternation keeps the regex engine's first-character prefilter; it
+# runs over upper-cased text, with an IGNORECASE variant for text whose upper-cased
+# form changes length (e.g. ligatures)
+LABEL_SCANNER = re.compile("|".join(re.escape(label) for label in LABELS))
+LABEL_SCANNER_IGNORECASE = re.compile(LABEL_SCANNER.pattern, re.IGNORECASE)
+LABEL_COLON_PATTERN = re.compile(r"\s*:\s*")
+LEADING_SPACE_PATTERN = re.compile(r"\s*")
+CHECKED_VALUE_PATTERN = re.compile(r"☑\s*([^\☐☑]+)")
+
+
+def _iter_label_offsets(text):
+    """Yields (label, offset) for every label in text, left to right
+
+    The text is upper-cased lazily in growing windows, so a caller that stops
+    early never pays for the rest of a large text.
+    """
+    overlap = LONGEST_LABEL - 1
+    base = 0
+    size = 4096
+    while base < len(text):
+        raw = text[base:base + size + overlap]
+        window = raw.upper()
+        scanner = LABEL_SCANNER
+        if len(window) != len(raw):
+            window, scanner = raw, LABEL_SCANNER_IGNORECASE
+
+        position = 0
+        while True:
+            match = scanner.search(window, position)
+            # Labels starting in the overlap belong to the next window
+            if match is None or match.start() >= size:
+                break
+            yield match.group().upper(), base + match.start()
+            position = match.start() + 1  # Labels may overlap (e.g. REGION inside SUB REGION)
+
+        base += size
+        size = min(size * 2, 1024 * 1024)
+
+
+# OCR fallback: "page" OCRs pages without any text layer, "hybrid" OCRs only the
+# regions of a page that lack one (scanned stamps, pasted table images, scans)
+OCR_MODES = ("page", "hybrid")
+REGION_MIN_DPI = 150
+REGION_MAX_DPI = 300
+REGION_MIN_SIZE = 12  # points; smaller images are icons or rules, not text
+
+# Outlet IDs listed on customer-mapping pages
+CUSTOMER_ID_PATTERN = re.compile(r"ID OUTLET\s*:\s*(\d+)")
+
+# Bump whenever format_json_response changes the shape or constants of its output, or
+# cached results change form (6: list_customer cached packed)
+RESULT_FORMAT_VERSION = 6
+
+# Identifies the parser behaviour; changing the field grammar or the output format changes
+# this value, which invalidates every cached result keyed on it
+PARSER_VERSION = hashlib.sha256(json.dumps([
+    RESULT_FORMAT_VERSION,
+    KEY_VALUE_FIELDS,
+    CHECKBOX_FIELDS,
+    CHECKED_VALUE_PATTERN.pattern,
+    CUSTOMER_ID_PATTERN.pattern,
+    TIER_TABLES,
+    TIER_TABLE_SETTINGS,
+    DEFAULT_PRODUCTS,
+    MIN_CONFIDENCE,
+    OCR_FOLD_TABLE,
+]).encode("utf-8")).hexdigest()[:16]
+
 
 class PDFHandler:
     """Handles PDF Parsing: Extract key-value pairs & tables using OCR"""
 
     @staticmethod
-    def extract_text_from_pdf(pdf_path):
-        """Extracts structured key-value pairs & tables from PDF"""
+    def extract_text_from_pdf(pdf_path, ocr_mode="page", product_master=None, page_cache=None,
+                              ocr_lang=DEFAULT_LANG, ocr_psm=DEFAULT_PSM):
+        """Extracts structured key-value pairs & tables from PDF in a single pass
+
+        ocr_lang and ocr_psm are the Tesseract language(s) (e.g. "eng+ind") and page
+        segmentation mode used for OCR. product_master is a CSV or Excel file of SKU names and m_product_ids; it is
+        indexed once per process. With a page_cache (a ResultCache), each page's parsed
+        fields are stored under its content fingerprint, and pages already seen in
+        any document (e.g. the unchanged pages of an amended CP) are not extracted again.
+        list_customer is a CustomerList; expand_customers() gives the verbose entries.
+        """
+        parsed_pages = PDFHandler.extract_page_range(pdf_path, ocr_mode=ocr_mode, page_cache=page_cache,
+                                                     ocr_lang=ocr_lang, ocr_psm=ocr_psm)
+        return PDFHandler.merge_pages(parsed_pages, product_master)
+
+    @staticmethod
+    def extract_page_range(pdf_path, start=0, stop=None, ocr_mode="page", page_cache=None,
+                           ocr_lang=DEFAULT_LANG, ocr_psm=DEFAULT_PSM):
+        """Parsed fields of pages [start, stop) of a PDF, in page order
+
+        Ranges of one document can be extracted by separate processes, each opening
+        the file itself; merge_pages on the concatenated ranges gives the same result
+        as extracting the whole document at once. Pages are streamed: each one is
+        released once parsed, so memory stays flat however long the document is.
+        """
+        # Open the document once; every page's text is extracted exactly once and
+        # shared by the key-value parser and the customer-ID extraction
+        with stage("open"):
+            pdf = pdfplumber.open(pdf_path)
+        with pdf:
+            parsed_pages = []
+            # Pages handed to iter_page_texts and not parsed yet: (index, page, page cache key)
+            pending = deque()
+            # OCR failures of the page being extracted
+            ocr_errors = []
+            page_variant = f"page:{ocr_mode}:{ocr_lang}:{ocr_psm}"
+            memo = {}
+
+            def pages_to_extract():
+                for index, page in enumerate(PDFHandler.iter_pages(pdf, start, stop)):
+                    key = None
+                    if page_cache is not None:
+                        with stage("page_fingerprint"):
+                            key = page_cache.key_for_digest(page_fingerprint(page, memo), page_variant)
+                        with stage("page_cache_lookup"):
+                            parsed = page_cache.get(key)
+                        if parsed is not None:
+                            count("pages")
+                            count("pages_reused")
+                            parsed_pages.append(parsed)
+                            page.close()
+                            continue
+                    parsed_pages.append(None)
+                    pending.append((index, page, key))
+                    yield page
+
+            page_texts = PDFHandler.iter_page_texts(pdf, ocr_mode, pages_to_extract(), get_engine(ocr_lang, ocr_psm),
+                                                    ocr_errors)
+            for text in page_texts:
+                index, page, key = pending.popleft()
+                parsed_pages[index] = PDFHandler.parse_page(page, text)
+                if ocr_errors:
+                    # Parsed from partial text; see pages_complete. Not cached either: every
+                    # identical page of later documents would be served the same gap
+                    parsed_pages[index]["ocr_errors"] = len(ocr_errors)
+                    ocr_errors.clear()
+                elif page_cache is not None:
+                    with stage("page_cache_store"):
+                        page_cache.put(key, parsed_pages[index])
+                # Drop the page's layout objects (chars, lines, rects) before moving on
+                page.close()
+                check_memory()
+        return parsed_pages
+
+    @staticmethod
+    def pages_complete(parsed_pages):
+        """True unless OCR failed on one of the pages (e.g. no tesseract binary, engine crash)
+
+        A result parsed from such pages is missing text and must not be cached: the
+        next run retries it instead of being served the degraded result.
+        """
+        return not any(parsed.get("ocr_errors") for parsed in parsed_pages)
+
+    @staticmethod
+    def iter_pages(pdf, start=0, stop=None):
+        """Yields pages [start, stop) of an open PDF one at a time
+
+        Unlike pdf.pages, which keeps every page (and all the layout objects parsed
+        on it) alive until the document is closed, nothing here holds on to a page
+        once the caller drops it.
+        """
+        from pdfminer.pdfpage import PDFPage
+        from pdfplumber.page import Page
+
+        doctop = 0
+        for index, page_obj in enumerate(PDFPage.create_pages(pdf.doc)):
+            if stop is not None and index >= stop:
+                break
+            # Same numbering and document offsets as pdf.pages
+            page = Page(pdf, page_obj, page_number=index + 1, initial_doctop=doctop)
+            doctop += page.height
+            if index >= start:
+                yield page
+
+    @staticmethod
+    def merge_pages(parsed_pages, product_master=None):
+        """Builds the JSON result from every page's parsed fields, list_customer as a CustomerList"""
         key_value_data = {}
+        tier_tables = {}
+
+        # Merge in page order: later pages override earlier key-value pairs
+        for parsed in parsed_pages:
+            key_value_data.update(parsed["key_values"])
+            for kind, rows in parsed["tier_tables"].items():
+                tier_tables.setdefault(kind, []).extend(rows)
+
+        with stage("format_json_response"):
+            # Stays a compact ID array; the verbose entries are built only when the result is written out
+            customer_list = CustomerList(customer_id for parsed in parsed_pages
+                                         for customer_id in parsed["customer_ids"])
+            return PDFHandler.format_json_response(key_value_data, customer_list, tier_tables,
+                                                   ProductIndex.load(product_master))
+
+    @staticmethod
+    def page_count(pdf_path):
+        """Number of pages of a PDF, read by pdfium without parsing any page"""
+        import pypdfium2
+
+        document = pypdfium2.PdfDocument(pdf_path)
+        try:
+            return len(document)
+        finally:
+            document.close()
+
+    @staticmethod
+    def parse_page(page, text):
+        """Fields parsed from one page: key-value pairs, customer IDs and tier tables"""
+        # Parse key-value pairs
+        with stage("parse_key_values"):
+            key_values = PDFHandler.parse_key_value_pairs(text)
+
+        # Collect customer IDs from the same page text
+        with stage("extract_customer_ids"):
+            customer_ids = PDFHandler.extract_customer_ids(text)
+
+        # Tier tables, detected only inside the regions their header words locate
+        with stage("tier_tables"):
+            tier_tables = TableEngine.extract_tier_tables(page, text)
+
+        return {"key_values": key_values, "customer_ids": customer_ids, "tier_tables": tier_tables}
+
+    @staticmethod
+    def iter_page_texts(pdf, ocr_mode="page", pages=None, engine=None, ocr_errors=None):
+        """Yields the text of each page of an open PDF (or of the given pages), falling back to OCR
+
+        ocr_mode "page" OCRs a whole page only when it has no text layer; "hybrid"
+        OCRs just the regions of each page that lack a text layer. engine is the
+        TesseractEngine to OCR with (default: English, automatic page segmentation).
+        A page whose OCR fails is yielded without the failed part; if ocr_errors is
+        a list, the errors are appended to it before the page's text is yielded.
+        """
+        if ocr_mode not in OCR_MODES:
+            raise ValueError(f"Unknown OCR mode {ocr_mode!r}, expected one of {OCR_MODES}")
+
+        raster_doc = None
+        try:
+            for page in pdf.pages if pages is None else pages:
+                count("pages")
+                if ocr_mode == "hybrid":
+                    # Open the rasterizer once per document, and only if some page needs it
+                    with stage("find_untexted_regions"):
+                        regions = PDFHandler.find_untexted_regions(page)
+                    if not regions:
+                        with stage("extract_text"):
+                            text = page.extract_text()
+                        yield text
+                        continue
+                    if raster_doc is None:
+                        raster_doc = PDFHandler.open_raster_document(pdf)
+                    raster_page = raster_doc[page.page_number - 1]
+                    try:
+                        with stage("hybrid_text"):
+                            text = PDFHandler.extract_hybrid_text(page, raster_page, regions, engine, ocr_errors)
+                    finally:
+                        raster_page.close()
+                    yield text
+                    continue
 
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
                 # Extract text directly from PDF
-                text = page.extract_text()
+                with stage("extract_text"):
+                    text = page.extract_text()
 
                 # If text is empty, use OCR
                 if not text:
-                    text = PDFHandler.ocr_from_pdf(page)
+                    if raster_doc is None:
+                        raster_doc = PDFHandler.open_raster_document(pdf)
+                    count("ocr_pages")
+                    raster_page = raster_doc[page.page_number - 1]
+                    try:
+                        with stage("ocr_fallback"):
+                            text = PDFHandler.ocr_from_pdf(page, raster_page, engine, ocr_errors)
+                    finally:
+                        raster_page.close()
 
-                # Parse key-value pairs
-                key_value_data.update(PDFHandler.parse_key_value_pairs(text))
+                yield text
+        finally:
+            if raster_doc is not None:
+                raster_doc.close()
 
-                customer_list = PDFHandler.extract_customer_list(pdf_path)
-        return PDFHandler.format_json_response(key_value_data, customer_list)
+    @staticmethod
+    def ocr_grayscale(gray, engine=None):
+        """Binarizes a grayscale image and runs Tesseract on it"""
+        from domain.preprocessing import PDF_PIPELINE
+
+        if engine is None:
+            engine = get_engine()
+
+        # The binarized page is consumed right away, so it can stay in the pipeline's buffer
+        with stage("preprocess"):
+            thresh = PDF_PIPELINE.run(gray, copy=False)
+        with stage("tesseract"):
+            return engine.image_to_string(thresh)
 
     @staticmethod
-    def ocr_from_pdf(page):
-        """Extract text using OCR from PDF image"""
+    def ocr_from_pdf(page, raster_page=None, engine=None, ocr_errors=None):
+        """Extract text using OCR from PDF image; "" (and the error appended to ocr_errors) if OCR fails"""
         try:
-            # Convert PDF page to image
-            image = page.to_image(resolution=300).original  # Increase resolution for better OCR
-            img = np.array(image)
-
-            # Preprocessing for OCR
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-            thresh = cv2.threshold(blurred, 150, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+            # Render straight to a grayscale array: no PIL image, no RGB copy
+            with stage("render"):
+                if raster_page is None:
+                    raster_doc = PDFHandler.open_raster_document(page.pdf)
+                    try:
+                        gray = PDFHandler.render_region(page, raster_doc[page.page_number - 1], page.bbox, 300)
+                    finally:
+                        raster_doc.close()
+                else:
+                    gray = PDFHandler.render_region(page, raster_page, page.bbox, 300)
 
             # Perform OCR
-            text = pytesseract.image_to_string(thresh, lang="eng")
-            return text
+            return PDFHandler.ocr_grayscale(gray, engine)
         except Exception as e:
+            count("ocr_errors")
             print(f"OCR Error: {e}")
+            if ocr_errors is not None:
+                ocr_errors.append(e)
             return ""
 
+    @staticmethod
+    def open_raster_document(pdf):
+        """Opens a pdfium handle on the same file, for rendering page regions"""
+        import pypdfium2
+
+        if pdf.path:
+            return pypdfium2.PdfDocument(pdf.path)
+        pdf.stream.seek(0)
+        return pypdfium2.PdfDocument(pdf.stream)
+
+    @staticmethod
+    def find_untexted_regions(page):
+        """Finds the regions of a page without a text layer, each with the DPI to OCR it at"""
+        x0, top, x1, bottom = page.bbox
+        if not page.chars and not page.images:
+            # No text layer and nothing to locate (e.g. vector outlines): OCR the whole page
+            return [((x0, top, x1, bottom), REGION_MAX_DPI)]
+
+        char_centers = [((char["x0"] + char["x1"]) / 2, (char["top"] + char["bottom"]) / 2)
+                        for char in page.chars]
+        regions = []
+        for image in page.images:
+            bbox = (max(image["x0"], x0), max(image["top"], top),
+                    min(image["x1"], x1), min(image["bottom"], bottom))
+            width, height = bbox[2] - bbox[0], bbox[3] - bbox[1]
+            if width < REGION_MIN_SIZE or height < REGION_MIN_SIZE:
+                continue
+
+            # Images that already sit under a text layer (e.g. OCRed scans) need no OCR
+            if any(bbox[0] <= cx <= bbox[2] and bbox[1] <= cy <= bbox[3] for cx, cy in char_centers):
+                continue
+
+            # Rendering above the image's own resolution adds pixels but no detail
+            native_dpi = image["srcsize"][0] * 72 / (image["x1"] - image["x0"])
+            dpi = min(max(native_dpi, REGION_MIN_DPI), REGION_MAX_DPI)
+            regions.append((bbox, dpi))
+
+        return PDFHandler.merge_regions(regions)
+
+    @staticmethod
+    def merge_regions(regions):
+        """Merges overlapping regions (e.g. tiled scan strips) into single crops"""
+        merged = []
+        for bbox, dpi in sorted(regions, key=lambda region: (region[0][1], region[0][0])):
+            for index, (other, other_dpi) in enumerate(merged):
+                if bbox[0] <= other[2] and other[0] <= bbox[2] and bbox[1] <= other[3] and other[1] <= bbox[3]:
+                    merged[index] = ((min(bbox[0], other[0]), min(bbox[1], other[1]),
+                                      max(bbox[2], other[2]), max(bbox[3], other[3])),
+                                     max(dpi, other_dpi))
+                    break
+            else:
+                merged.append((bbox, dpi))
+        return merged
+
+    @staticmethod
+    def render_region(page, raster_page, bbox, dpi):
+        """Renders only bbox of a page to a grayscale NumPy array"""
+        x0, top, x1, bottom = page.bbox
+        crop = (bbox[0] - x0, bottom - bbox[3], x1 - bbox[2], bbox[1] - top)  # left, bottom, right, top
+        bitmap = raster_page.render(
+            scale=dpi / 72,
+            crop=crop,
+            grayscale=True,
+            no_smoothtext=True,
+            no_smoothpath=True,
+            no_smoothimage=True,
+        )
+        return bitmap.to_numpy()
+
+    @staticmethod
+    def extract_hybrid_text(page, raster_page, regions, engine=None, ocr_errors=None):
+        """Merges native text lines with OCR of untexted regions, in reading order
+
+        A region whose OCR fails is left out, and the error appended to ocr_errors.
+        """
+        blocks = [(line["top"], line["x0"], line["text"]) for line in page.extract_text_lines()]
+        for bbox, dpi in regions:
+            count("ocr_regions")
+            try:
+                with stage("render"):
+                    gray = PDFHandler.render_region(page, raster_page, bbox, dpi)
+                text = PDFHandler.ocr_grayscale(gray, engine).strip()
+            except Exception as e:
+                count("ocr_errors")
+                print(f"OCR Error: {e}")
+                if ocr_errors is not None:
+                    ocr_errors.append(e)
+                continue
+            if text:
+                blocks.append((bbox[1], bbox[0], text))
+
+        blocks.sort(key=lambda block: (block[0], block[1]))
+        return "\n".join(text for _, _, text in blocks)
+
     @staticmethod
     def parse_key_value_pairs(text):
-        """Extracts structured key-value pairs from OCR text"""
-        key_value_dict = {}
-
-        # Define regex patterns for extracting key-value pairs
-        patterns = {
-            "NOMOR": r"NOMOR\s*:\s*(.*)",
-            "PRODUCT CATEGORY": r"PRODUCT CATEGORY\s*:\s*(.*?)\s*REF DOC",
-            "BRAND": r"BRAND\s*:\s*(.*?)\s*REF CP NO",
-            "CHANNEL": r"CHANNEL\s*:\s*(.*?)\s*PERIODE CP",
-            "REGION": r"REGION\s*:\s*(.*?)\s*GROUP OUTLET",
-            "SUB REGION": r"SUB REGION\s*:\s*(.*)",
-            "DISTRIBUTOR": r"DISTRIBUTOR\s*:\s*(.*)",
-            "PROMO TYPE": r"PROMO TYPE\s*:\s*(.*?)\s*COMPENSATION",
-            "SUB PROMO TYPE": r"SUB PROMO TYPE\s*:\s*(.*)",
-            "MECHANISM": r"MECHANISM\s*:\s*([\s\S]*?)(?=\s*DISCOUNT PROMOTION|$)",
-            "REF DOC": r"REF DOC\s*:\s*(.*)",
-            "REF CP NO": r"REF CP NO\s*:\s*(.*)",
-            "PERIODE CP": r"PERIODE CP\s*:\s*(.*)",
-            "GROUP OUTLET": r"GROUP OUTLET\s*:\s*(.*?)\s*SUB REGION",
-            "COMPENSATION": r"COMPENSATION\s*:\s*(.*?)\s*SUB PROMO TYPE"
-        }
+        """Extracts structured key-value pairs from OCR text in one left-to-right scan"""
+        found = {}
+        checkbox_values = {}
+        open_fields = set(KEY_VALUE_FIELDS) | set(CHECKBOX_FIELDS)
+        claimed_checkboxes = set()
+        # Terminator label -> [(key, rule, value_start)] still waiting for that terminator
+        waiting = {}
 
-        # Extract general key-value pairs
-        for key, pattern in patterns.items():
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                key_value_dict[key] = match.group(1).strip()
+        def resolve(key, rule, value_start, value_end):
+            """Slices a value between label offsets; returns False if the candidate is rejected"""
+            value = text[value_start:value_end]
+            if rule == "checkbox":
+                checkbox_values[key] = value.rstrip()
+            elif rule == "until" and "\n" in value.rstrip():
+                # Only trailing whitespace may span lines before the terminator
+                return False
+            else:
+                found[key] = value.strip()
+            open_fields.discard(key)
+            return True
 
-        # Extract checkbox-based values
-        checkbox_patterns = {
-            "COST CATEGORY": r"COST CATEGORY\s*([\s\S]*?)\s*(?=TIPE CP|$)",
-            "TIPE CP": r"TIPE CP\s*([\s\S]*?)\s*(?=TIPE CLAIM|$)",
-            "TIPE CLAIM": r"TIPE CLAIM\s*([\s\S]*?)\s*(?=CLAIM BASED|$)",
-            "CLAIM BASED": r"CLAIM BASED\s*([\s\S]*?)\s*(?=MECHANISM|$)"
-        }
+        for label, start in _iter_label_offsets(text):
+            # The label ends the values of earlier fields waiting for it
+            candidates = waiting.get(label)
+            if candidates:
+                remaining = []
+                for key, rule, value_start in candidates:
+                    if key not in open_fields:
+                        continue
+                    if value_start > start or not resolve(key, rule, value_start, start):
+                        remaining.append((key, rule, value_start))
+                waiting[label] = remaining
+
+            if not open_fields:
+                break
 
-        for key, pattern in checkbox_patterns.items():
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                values = match.group(1)
+            # The label starts a new value
+            if label not in open_fields:
+                continue
+            value_start = start + len(label)
+            if label in CHECKBOX_FIELDS:
+                # Only the first occurrence of a checkbox label counts
+                if label not in claimed_checkboxes:
+                    claimed_checkboxes.add(label)
+                    value_start = LEADING_SPACE_PATTERN.match(text, value_start).end()
+                    waiting.setdefault(CHECKBOX_FIELDS[label], []).append((label, "checkbox", value_start))
+                continue
+
+            colon = LABEL_COLON_PATTERN.match(text, value_start)
+            if colon is None:
+                continue
+            rule, terminator = KEY_VALUE_FIELDS[label]
+            if rule == "line":
+                line_end = text.find("\n", colon.end())
+                resolve(label, rule, colon.end(), line_end if line_end != -1 else len(text))
+            else:
+                waiting.setdefault(terminator, []).append((label, rule, colon.end()))
+
+        # Block and checkbox values without a terminator run to the end of the text
+        for candidates in waiting.values():
+            for key, rule, value_start in candidates:
+                if key in open_fields and rule != "until":
+                    resolve(key, rule, value_start, len(text))
+
+        key_value_dict = {key: found[key] for key in KEY_VALUE_FIELDS if key in found}
+
+        # Extract checkbox-based values
+        for key in CHECKBOX_FIELDS:
+            if key in checkbox_values:
                 # Extract only checked (☑) values
-                checked_values = re.findall(r"☑\s*([^\☐☑]+)", values)
+                checked_values = CHECKED_VALUE_PATTERN.findall(checkbox_values[key])
                 if checked_values:
                     key_value_dict[key] = ", ".join(checked_values).strip()
 
         return key_value_dict
 
     @staticmethod
-    def format_json_response(metadata, customer_list):
+    def format_json_response(metadata, customer_list, tier_tables=None, product_index=None):
         """Formats extracted data into the required JSON structure"""
         # Extract vendor_id from DISTRIBUTOR field
         vendor_id = int(re.search(r"\d+", metadata.get("DISTRIBUTOR", "0")).group())
@@ -109,15 +563,10 @@ class PDFHandler:
         validfrom = periode_cp.split(" - ")[0].replace("/", "") if periode_cp else "20250306"
         validto = periode_cp.split(" - ")[1].replace("/", "") if periode_cp else "20250315"
 
-        # Map SKU to m_product_id
-        sku_to_product_id = {
-            "MILA FLOUR BAG @1KG": 1002979,
-            # Add more SKU mappings here if needed
-        }
-
         # Get m_product_id from SKU
+        product_index = product_index or ProductIndex.load()
         sku = metadata.get("PRODUCT CATEGORY", "")
-        m_product_id = sku_to_product_id.get(sku, 0)
+        m_product_id = PDFHandler.lookup_product_id(product_index, sku, 0)
 
         json_output = {
             "m_discountschema_id": 0,
@@ -154,81 +603,136 @@ class PDFHandler:
                 }
             ],
             "list_customer": customer_list,
-            "list_break": [
-                {
-                    "m_discountschema_id": 0,
-                    "m_discountschemabreak_id": 0,
-                    "ad_org_id": 0,
-                    "seqno": 10,
-                    "targetbreak": "EP",
-                    "discounttype": "PVD",
-                    "breaktype": "M",
-                    "calculationtype": "Q",
-                    "name": metadata.get("NOMOR", ""),
-                    "requirementtype": "MS",
-                    "productselection": "IOP",
-                    "c_uom_id": 1000020,
-                    "m_product_id": m_product_id,
-                    "m_product_category_id": None,
-                    "budgettype": "GB",
-                    "budgetcalculation": "QTY",
-                    "qtyallocated": 500,
-                    "breakvalue": 0,
-                    "breakdiscount": 0,
-                    "isshareddiscount": "Y",
-                    "isincludingsubordinate": "N",
-                    "isbirthdaydiscount": "N",
-                    "isonlycountmaxrange": "Y",
-                    "ismix": "N",
-                    "isdiscountedbonus": "N",
-                    "isstrictstrata": "Y",
-                    "isvendorcashback": "N",
-                    "ismixrequired": "N",
-                    "isstratabudget": "Y",
-                    "isactive": "Y",
-                    "list_product": [],
-                    "list_customer": [],
-                    "list_bonus": [],
-                    "list_budget": [],
-                    "list_line": [
-                        {
-                            "m_discountschemabreak_id": 0,
-                            "uns_dsbreakline_id": 0,
-                            "name": metadata.get("NOMOR", ""),
-                            "breakvalue": 100,
-                            "breakvalueto": 299,
-                            "qtyallocated": 500,
-                            "breakdiscount": 5.04,
-                            "seconddiscount": 0,
-                            "thirddiscount": 0,
-                            "fourthdiscount": 0,
-                            "fifthdiscount": 0,
-                            "isactive": "Y",
-                            "list_bonus": [],
-                            "list_budget": []
-                        }
-                    ]
-                }
-            ]
+            "list_break": PDFHandler.build_break_list(metadata, tier_tables or {}, m_product_id, product_index)
         }
         return json_output
 
+    @staticmethod
+    def build_break_list(metadata, tier_tables, m_product_id, product_index):
+        """Builds list_break from the tier tables: one break per SKU, one list_line per tier
+
+        Documents without a recognized quantity tier table keep the default single tier.
+        """
+        # Only quantity tiers fit this break template (calculationtype "Q", carton c_uom_id).
+        # Sales-value tiers ("value", in rupiah) are parsed but not emitted until their
+        # amount-break mapping is known; stated as quantities they would read as millions of cartons
+        tiers = tier_tables.get("quantity")
+        if not tiers:
+            return [PDFHandler.build_break(metadata, 10, m_product_id, 500, [
+                PDFHandler.build_break_line(metadata, 100, 299, 500, 5.04)
+            ])]
+
+        commitments = {row["sku"]: row["quantity"] for row in tier_tables.get("commitment", [])}
+        groups = {}
+        for tier in tiers:
+            groups.setdefault(tier.get("sku"), []).append(tier)
+
+        list_break = []
+        for index, (sku, sku_tiers) in enumerate(groups.items()):
+            qtyallocated = commitments.get(sku, 0)
+            list_line = []
+            for position, tier in enumerate(sku_tiers):
+                breakvalueto = tier["to"]
+                if breakvalueto is None:
+                    # A tier ends just below the next one; 0 leaves the last tier open-ended
+                    breakvalueto = sku_tiers[position + 1]["from"] - 1 if position + 1 < len(sku_tiers) else 0
+                list_line.append(PDFHandler.build_break_line(
+                    metadata, tier["from"], breakvalueto, qtyallocated, tier["discount"]
+                ))
+            product_id = PDFHandler.lookup_product_id(product_index, sku, m_product_id)
+            list_break.append(PDFHandler.build_break(metadata, (index + 1) * 10, product_id, qtyallocated, list_line))
+        return list_break
+
+    @staticmethod
+    def lookup_product_id(product_index, sku, default):
+        """m_product_id of a SKU name from the product index; fuzzy matches are counted"""
+        match = product_index.match(sku)
+        if match is None:
+            if sku:
+                count("product_unmatched")
+            return default
+        if match.confidence < 1.0:
+            count("product_fuzzy_matches")
+        return match.product_id
+
+    @staticmethod
+    def build_break(metadata, seqno, m_product_id, qtyallocated, list_line):
+        """One list_break entry"""
+        return {
+            "m_discountschema_id": 0,
+            "m_discountschemabreak_id": 0,
+            "ad_org_id": 0,
+            "seqno": seqno,
+            "targetbreak": "EP",
+            "discounttype": "PVD",
+            "breaktype": "M",
+            "calculationtype": "Q",
+            "name": metadata.get("NOMOR", ""),
+            "requirementtype": "MS",
+            "productselection": "IOP",
+            "c_uom_id": 1000020,
+            "m_product_id": m_product_id,
+            "m_product_category_id": None,
+            "budgettype": "GB",
+            "budgetcalculation": "QTY",
+            "qtyallocated": qtyallocated,
+            "breakvalue": 0,
+            "breakdiscount": 0,
+            "isshareddiscount": "Y",
+            "isincludingsubordinate": "N",
+            "isbirthdaydiscount": "N",
+            "isonlycountmaxrange": "Y",
+            "ismix": "N",
+            "isdiscountedbonus": "N",
+            "isstrictstrata": "Y",
+            "isvendorcashback": "N",
+            "ismixrequired": "N",
+            "isstratabudget": "Y",
+            "isactive": "Y",
+            "list_product": [],
+            "list_customer": [],
+            "list_bonus": [],
+            "list_budget": [],
+            "list_line": list_line
+        }
+
+    @staticmethod
+    def build_break_line(metadata, breakvalue, breakvalueto, qtyallocated, breakdiscount):
+        """One list_line entry (a discount tier)"""
+        return {
+            "m_discountschemabreak_id": 0,
+            "uns_dsbreakline_id": 0,
+            "name": metadata.get("NOMOR", ""),
+            "breakvalue": breakvalue,
+            "breakvalueto": breakvalueto,
+            "qtyallocated": qtyallocated,
+            "breakdiscount": breakdiscount,
+            "seconddiscount": 0,
+            "thirddiscount": 0,
+            "fourthdiscount": 0,
+            "fifthdiscount": 0,
+            "isactive": "Y",
+            "list_bonus": [],
+            "list_budget": []
+        }
+
+    @staticmethod
+    def extract_customer_ids(text):
+        """Extracts outlet customer IDs from a page's text"""
+        if not text:
+            return []
+        return [int(customer_id) for customer_id in CUSTOMER_ID_PATTERN.findall(text)]
+
+    @staticmethod
+    def build_customer_list(customer_ids):
+        """Builds the list_customer entries for the given customer IDs, without duplicates"""
+        return CustomerList(customer_ids).entries()
+
     @staticmethod
     def extract_customer_list(pdf_path):
         """Extracts customer list from the PDF file"""
-        customer_list = []
+        customer_ids = []
         with pdfplumber.open(pdf_path) as pdf:
             for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    # Extract customer IDs from the text
-                    customer_ids = re.findall(r"ID OUTLET\s*:\s*(\d+)", text)
-                    for customer_id in customer_ids:
-                        customer_list.append({
-                            "m_discountschema_id": 0,
-                            "uns_discount_customer_id": 0,
-                            "m_discountschemabreak_id": 0,
-                            "ad_org_id": 0,
-                            "c_bpartner_id": int(customer_id)
-                        })
-        return customer_list
\ No newline at end of file
+                customer_ids.extend(PDFHandler.extract_customer_ids(page.extract_text()))
+        return PDFHandler.build_customer_list(customer_ids)
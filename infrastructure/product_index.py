@@ -0,0 +1,245 @@
+import csv
+import hashlib
+import math
+import os
+import re
+from array import array
+from collections import namedtuple
+from functools import lru_cache
+
+# Products known without a product master file
+DEFAULT_PRODUCTS = {
+    "MILA FLOUR BAG @1KG": 1002979,
+}
+
+# Column names tried, in order, when the master file's columns are not given explicitly
+NAME_COLUMNS = ("SKU", "PRODUCT NAME", "PRODUCT", "NAME")
+ID_COLUMNS = ("M_PRODUCT_ID", "PRODUCT_ID", "PRODUCT ID", "ID")
+
+MIN_CONFIDENCE = 0.75  # Dice similarity of trigram sets below which a fuzzy match is rejected
+FAST_PASS_CONFIDENCE = 0.9  # Fuzzy lookups try this threshold first, which needs far fewer candidates
+SEED_CANDIDATES = 8  # Candidates scored up front to set the bar the others must be able to beat
+DIRECT_SCORE_LIMIT = 32  # Up to this many candidates are scored with sets rather than numpy passes
+LOOKUP_CACHE_SIZE = 4096  # Distinct names remembered per index; SKU names repeat across documents
+
+# Everything but letters and digits is dropped, so spacing, case and punctuation never matter
+KEY_STRIP_PATTERN = re.compile(r"[^0-9A-Z]+")
+# Characters OCR confuses with each other collapse to one in fuzzy keys ("FL0UR" -> "FIOUR" <- "FLOUR")
+OCR_FOLD_TABLE = str.maketrans("01L58", "OIISB")
+OCR_FOLD_CONFIDENCE = 0.95  # Confidence of a name that only differs by OCR-confusable characters
+
+ProductMatch = namedtuple("ProductMatch", ["product_id", "name", "confidence"])
+
+
+def normalize_key(name):
+    """Lookup key of a product name: upper-cased letters and digits only"""
+    return KEY_STRIP_PATTERN.sub("", str(name).upper())
+
+
+def fold_key(key):
+    """Fuzzy key of a normalized key, with OCR-confusable characters folded together"""
+    return key.translate(OCR_FOLD_TABLE)
+
+
+def _trigrams(key):
+    if len(key) < 3:
+        return {key} if key else set()
+    return {key[i:i + 3] for i in range(len(key) - 2)}
+
+
+def _dice(grams, other):
+    """Dice similarity of two trigram sets"""
+    return 2 * len(grams & other) / (len(grams) + len(other))
+
+
+class ProductIndex:
+    """SKU name -> m_product_id lookup over a product master
+
+    Exact lookups go through a hash of normalized keys, then a hash of OCR-folded keys.
+    Names that differ by more (typos, lost or extra characters) fall back to a trigram
+    index over the folded keys: only products sharing one of the query's rarest
+    trigrams are scored, which keeps fuzzy lookups to a handful of candidates however
+    large the master is.
+    """
+
+    def __init__(self, products=(), min_confidence=MIN_CONFIDENCE):
+        self.min_confidence = min_confidence
+        self.names = []
+        self.keys = []
+        self.product_ids = array("q")
+        self.gram_counts = array("H")
+        self.exact = {}
+        self.folded = {}
+        self.postings = {}
+        digest = hashlib.sha256()
+        for name, product_id in products:
+            key = normalize_key(name)
+            # The first product listed for a key wins
+            if not key or key in self.exact:
+                continue
+            position = len(self.keys)
+            folded = fold_key(key)
+            self.exact[key] = position
+            self.folded.setdefault(folded, position)
+            self.names.append(name)
+            self.keys.append(folded)
+            self.product_ids.append(int(product_id))
+            grams = _trigrams(folded)
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(position)
+            digest.update(f"{key}\t{product_id}\n".encode("utf-8"))
+        # Identifies the indexed products, e.g. in cache keys of results built with this index
+        self.fingerprint = digest.hexdigest()[:16]
+        self.postings = {gram: array("i", positions) for gram, positions in self.postings.items()}
+        self.match = lru_cache(maxsize=LOOKUP_CACHE_SIZE)(self._match)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, name, default=0):
+        """m_product_id for a product name, or default when nothing matches confidently"""
+        match = self.match(name)
+        return default if match is None else match.product_id
+
+    def _match(self, name):
+        """Best ProductMatch for a name (confidence 1.0 for exact keys), or None"""
+        key = normalize_key(name or "")
+        if not key:
+            return None
+        position = self.exact.get(key)
+        if position is not None:
+            return ProductMatch(self.product_ids[position], self.names[position], 1.0)
+        key = fold_key(key)
+        position = self.folded.get(key)
+        if position is not None:
+            return ProductMatch(self.product_ids[position], self.names[position], OCR_FOLD_CONFIDENCE)
+
+        grams = _trigrams(key)
+        # Trigrams no product has can never be shared; the rest, rarest first
+        postings = sorted((self.postings[gram] for gram in grams if gram in self.postings), key=len)
+        # A close match is found from fewer, rarer trigrams; only without one does the search
+        # widen to everything that could still reach min_confidence
+        thresholds = (FAST_PASS_CONFIDENCE, self.min_confidence) \
+            if self.min_confidence < FAST_PASS_CONFIDENCE else (self.min_confidence,)
+        for threshold in thresholds:
+            best = self._best_candidate(grams, postings, threshold)
+            if best is not None:
+                confidence, position = best
+                return ProductMatch(self.product_ids[position], self.names[position], round(confidence, 4))
+        return None
+
+    def _best_candidate(self, grams, postings, threshold):
+        """(score, position) of the best product scoring at least threshold, or None"""
+        # Dice = 2s / (q + c) with c >= s, so a product reaching threshold shares at least
+        # `needed` trigrams and must hold one of the len(postings) - needed + 1 rarest
+        needed = math.ceil(round(threshold * len(grams) / (2 - threshold), 9))
+        if len(postings) < needed:
+            return None
+
+        import numpy as np
+
+        prefix = len(postings) - needed + 1
+        candidates, shared = np.unique(np.concatenate([np.frombuffer(p, dtype=np.int32) for p in postings[:prefix]]),
+                                       return_counts=True)
+        lengths = np.frombuffer(self.gram_counts, dtype=np.uint16)[candidates]
+
+        # The best of the candidates with the most prefix hits sets the score to beat; the rest
+        # are kept only if sharing every trigram outside the prefix as well could still beat it
+        floor = threshold
+        for index in np.flatnonzero(shared == shared.max())[:SEED_CANDIDATES]:
+            floor = max(floor, _dice(grams, _trigrams(self.keys[candidates[index]])))
+        bound = 2 * np.minimum(shared + (len(postings) - prefix), lengths) / (len(grams) + lengths)
+        keep = bound >= floor
+        candidates, shared, lengths = candidates[keep], shared[keep], lengths[keep]
+        if not len(candidates):
+            return None
+
+        if len(candidates) <= DIRECT_SCORE_LIMIT:
+            # Few enough to score one by one, cheaper than a numpy pass per remaining trigram
+            best = None
+            for position in candidates.tolist():
+                score = _dice(grams, _trigrams(self.keys[position]))
+                if score >= threshold and (best is None or score > best[0]):
+                    best = (score, position)
+            return best
+
+        # Exact counts: binary search for the candidates in the remaining (sorted) postings
+        for posting in postings[prefix:]:
+            posting = np.frombuffer(posting, dtype=np.int32)
+            found = np.searchsorted(posting, candidates)
+            shared += posting[np.minimum(found, len(posting) - 1)] == candidates
+
+        scores = 2 * shared / (len(grams) + lengths)
+        best = int(np.argmax(scores))
+        if scores[best] < threshold:
+            return None
+        return float(scores[best]), int(candidates[best])
+
+    @staticmethod
+    def from_file(path, name_column=None, id_column=None, min_confidence=MIN_CONFIDENCE):
+        """Builds an index from a CSV or Excel product master"""
+        if os.path.splitext(path)[1].lower() in (".xlsx", ".xlsm", ".xls"):
+            from infrastructure.excel_handler import ExcelHandler
+
+            chunks = (records for _, records in ExcelHandler.iter_excel_records(path))
+        else:
+            chunks = ProductIndex._csv_chunks(path)
+
+        def products():
+            columns = None
+            for records in chunks:
+                for record in records:
+                    if columns is None:
+                        columns = (name_column or ProductIndex._find_column(record, NAME_COLUMNS, path),
+                                   id_column or ProductIndex._find_column(record, ID_COLUMNS, path))
+                    name, product_id = record.get(columns[0]), ProductIndex._product_id(record.get(columns[1]))
+                    # Rows without a name or a numeric id (blanks, notes) are skipped; NaN != NaN
+                    if name is None or name != name or product_id is None:
+                        continue
+                    yield str(name), product_id
+
+        return ProductIndex(products(), min_confidence=min_confidence)
+
+    @staticmethod
+    def _csv_chunks(path):
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            yield csv.DictReader(f)
+
+    @staticmethod
+    def _product_id(value):
+        # Excel id columns with blanks come back as floats
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        value = str(value).strip()
+        return int(value) if value.isdigit() else None
+
+    @staticmethod
+    def _find_column(record, candidates, path):
+        by_upper = {str(column).strip().upper(): column for column in record}
+        for candidate in candidates:
+            if candidate in by_upper:
+                return by_upper[candidate]
+        raise ValueError(f"{path}: none of the columns {', '.join(candidates)} found")
+
+    @staticmethod
+    def load(path=None):
+        """Index for a product master file, built once per process and file version
+
+        Without a path, the index holds DEFAULT_PRODUCTS.
+        """
+        if path is None:
+            return _default_index()
+        stat = os.stat(path)
+        return _load_index(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=1)
+def _default_index():
+    return ProductIndex(DEFAULT_PRODUCTS.items())
+
+
+@lru_cache(maxsize=4)
+def _load_index(path, mtime_ns, size):
+    # mtime and size are part of the cache key only, so an edited master is reloaded
+    return ProductIndex.from_file(path)
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import tempfile
+
+from domain.customer_list import pack_customers, packed_object_hook
+
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """Returns the SHA-256 hex digest of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Content-addressed on-disk cache of extraction results with size-bounded LRU eviction
+
+    Entries are keyed by the hash of the source bytes plus a version string, so
+    byte-identical duplicates share one entry and a parser change misses the cache.
+    Recency is tracked through file mtimes, which keeps the cache safe to share
+    between worker processes without a lock.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_CACHE_MAX_BYTES, version=""):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.version = version
+        self._size = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key_for(self, path, variant=""):
+        """Cache key for a source file under the current version and extraction options"""
+        return self.key_for_digest(file_digest(path), variant)
+
+    def key_for_digest(self, digest, variant=""):
+        """Cache key for content identified by a digest (e.g. one page of a PDF)"""
+        return hashlib.sha256(f"{self.version}:{variant}:{digest}".encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """Returns the cached result for key, or None on a miss"""
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                result = json.load(f, object_hook=packed_object_hook)
+        except (OSError, ValueError):
+            return None
+        # Mark as recently used
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return result
+
+    def put(self, key, result):
+        """Stores a result, evicting least recently used entries beyond max_bytes"""
+        entry_path = self._entry_path(key)
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+
+        # Write atomically so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(entry_path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                # Customer lists stay packed in the cache, as they are in memory
+                json.dump(pack_customers(result), f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, entry_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        if self._size is None:
+            self._size = self._total_size()
+        else:
+            self._size += os.path.getsize(entry_path)
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _entries(self):
+        for shard in os.scandir(self.cache_dir):
+            if shard.is_dir():
+                for entry in os.scandir(shard.path):
+                    if entry.name.endswith(".json"):
+                        yield entry
+
+    def _total_size(self):
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def _evict(self):
+        """Removes the least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
@@ -0,0 +1,193 @@
+import re
+
+# Tier tables, located by the header words of their anchor column (upper-cased, in reading order);
+# columns maps each value we read to a header label contained in that column's header cell
+#   "quantity":   discount tiers by minimum carton quantity, per SKU   (CP "STRATA DISCOUNT TABLE")
+#   "value":      discount tiers by sales-value range                  (SURAT "Strata Penjualan")
+#   "commitment": committed carton quantity per SKU                    (CP "SALES COMITMENT")
+TIER_TABLES = {
+    "quantity": {
+        "anchor": ("MIN", "QTY"),
+        "columns": {"sku": "SKU", "bound": "MIN QTY", "discount": "DISC %"},
+    },
+    "value": {
+        "anchor": ("STRATA", "PENJUALAN"),
+        "columns": {"bound": "STRATA PENJUALAN", "discount": "DISC REGULER"},
+    },
+    "commitment": {
+        "anchor": ("SALES", "COMITMENT"),
+        "columns": {"sku": "SKU", "quantity": "QTY IN CTN"},
+    },
+}
+
+# The crop holds a single ruled table, so ruling lines alone delimit its cells
+TIER_TABLE_SETTINGS = {
+    "vertical_strategy": "lines",
+    "horizontal_strategy": "lines",
+    "snap_tolerance": 3,
+    "join_tolerance": 3,
+    "intersection_tolerance": 3,
+}
+RULING_SEED_DISTANCE = 72  # points; furthest a cell wall may be from its header words
+RULING_JOIN_TOLERANCE = 2  # points; ruling closer than this belongs to the same table
+
+# Cell values: "'100/0" cartons/units, "1,000,001 - 3,000,000" or "10,000,001 ( SO ) - up", "5,04" or "1.0%"
+CARTON_QUANTITY_PATTERN = re.compile(r"(\d[\d.,]*)\s*/\s*\d+")
+VALUE_RANGE_PATTERN = re.compile(r"(\d[\d.,]*)\s*(?:\([^)]*\))?\s*-\s*(UP|\d[\d.,]*)", re.IGNORECASE)
+PERCENT_PATTERN = re.compile(r"\d+(?:[.,]\d+)?")
+
+
+def _normalize(cell):
+    return " ".join((cell or "").split()).upper()
+
+
+def _whole_number(text):
+    return int(re.sub(r"[.,]", "", text))
+
+
+class TableEngine:
+    """Locates tier tables from page words and extracts them from cropped regions only"""
+
+    @staticmethod
+    def extract_tier_tables(page, text):
+        """Returns {kind: [row dict, ...]} for the tier tables on a page
+
+        Only pages whose text mentions a table's anchor pay for word extraction, and
+        table detection runs only inside the ruling around the anchor.
+        """
+        upper_text = (text or "").upper()
+        kinds = [kind for kind, spec in TIER_TABLES.items() if " ".join(spec["anchor"]) in upper_text]
+        if not kinds:
+            return {}
+
+        words = page.extract_words()
+        tables = {}
+        for kind in kinds:
+            spec = TIER_TABLES[kind]
+            anchor = TableEngine.find_anchor(words, spec["anchor"])
+            if anchor is None:
+                continue
+            region = TableEngine.ruled_region(page, anchor)
+            if region is None:
+                continue
+            for table in page.crop(region, strict=False).extract_tables(TIER_TABLE_SETTINGS):
+                rows = TableEngine.parse_table(kind, table)
+                if rows:
+                    tables[kind] = rows
+                    break
+        return tables
+
+    @staticmethod
+    def find_anchor(words, tokens):
+        """Bounding box of the first run of words spelling tokens, or None"""
+        for index in range(len(words) - len(tokens) + 1):
+            run = words[index:index + len(tokens)]
+            if all(word["text"].upper() == token for word, token in zip(run, tokens)):
+                return (min(word["x0"] for word in run), min(word["top"] for word in run),
+                        max(word["x1"] for word in run), max(word["bottom"] for word in run))
+        return None
+
+    @staticmethod
+    def ruled_region(page, anchor):
+        """Bounding box of the ruling (rects, lines, curves) connected to the anchor's cell
+
+        The walls nearest to the anchor in each direction seed the region, which then
+        grows over touching ruling. Tables are separated by unruled gaps, so growth
+        stops at the edge of the anchor's own table.
+        """
+        pending = [(obj["x0"], obj["top"], obj["x1"], obj["bottom"])
+                   for obj in page.rects + page.lines + page.curves]
+        center_x, center_y = (anchor[0] + anchor[2]) / 2, (anchor[1] + anchor[3]) / 2
+
+        # Nearest wall on each side of the anchor: (distance, box) for left, right, above, below
+        walls = [None, None, None, None]
+        for box in pending:
+            if box[1] <= center_y <= box[3]:
+                sides = [(0, anchor[0] - box[2]), (1, box[0] - anchor[2])]
+            elif box[0] <= center_x <= box[2]:
+                sides = [(2, anchor[1] - box[3]), (3, box[1] - anchor[3])]
+            else:
+                continue
+            for side, distance in sides:
+                if 0 <= distance <= RULING_SEED_DISTANCE and (walls[side] is None or distance < walls[side][0]):
+                    walls[side] = (distance, box)
+
+        region = None
+        for wall in walls:
+            if wall is not None:
+                box = wall[1]
+                region = box if region is None else (min(region[0], box[0]), min(region[1], box[1]),
+                                                     max(region[2], box[2]), max(region[3], box[3]))
+        if region is None:
+            return None
+
+        grown = True
+        while grown:
+            grown = False
+            x0, top = region[0] - RULING_JOIN_TOLERANCE, region[1] - RULING_JOIN_TOLERANCE
+            x1, bottom = region[2] + RULING_JOIN_TOLERANCE, region[3] + RULING_JOIN_TOLERANCE
+            remaining = []
+            for box in pending:
+                if box[0] <= x1 and x0 <= box[2] and box[1] <= bottom and top <= box[3]:
+                    region = (min(region[0], box[0]), min(region[1], box[1]),
+                              max(region[2], box[2]), max(region[3], box[3]))
+                    grown = True
+                else:
+                    remaining.append(box)
+            pending = remaining
+
+        page_x0, page_top, page_x1, page_bottom = page.bbox
+        return (max(region[0] - 1, page_x0), max(region[1] - 1, page_top),
+                min(region[2] + 1, page_x1), min(region[3] + 1, page_bottom))
+
+    @staticmethod
+    def parse_table(kind, table):
+        """Maps a detected table's header to columns and parses its data rows"""
+        columns = {}
+        header_end = -1
+        for name, label in TIER_TABLES[kind]["columns"].items():
+            for row_index, row in enumerate(table):
+                cell_index = next((i for i, cell in enumerate(row) if label in _normalize(cell)), None)
+                if cell_index is not None:
+                    columns[name] = cell_index
+                    header_end = max(header_end, row_index)
+                    break
+            else:
+                return []
+
+        rows = []
+        sku = None
+        for row in table[header_end + 1:]:
+            cells = {name: _normalize(row[index]) if index < len(row) else "" for name, index in columns.items()}
+            # Tiers after the first of a SKU leave its (vertically merged) cell empty
+            sku = cells.get("sku") or sku
+            parsed = TableEngine.parse_row(kind, cells)
+            if parsed is not None:
+                if "sku" in columns:
+                    parsed["sku"] = sku
+                rows.append(parsed)
+        return rows
+
+    @staticmethod
+    def parse_row(kind, cells):
+        """Parses one data row, or returns None for rows that are not tiers (notes, sub-headers)"""
+        if kind == "commitment":
+            quantity = CARTON_QUANTITY_PATTERN.search(cells["quantity"])
+            return {"quantity": _whole_number(quantity.group(1))} if quantity else None
+
+        discount = PERCENT_PATTERN.search(cells["discount"])
+        if discount is None:
+            return None
+        discount = float(discount.group().replace(",", "."))
+
+        if kind == "quantity":
+            bound = CARTON_QUANTITY_PATTERN.search(cells["bound"])
+            if bound is None:
+                return None
+            return {"from": _whole_number(bound.group(1)), "to": None, "discount": discount}
+
+        bound = VALUE_RANGE_PATTERN.search(cells["bound"])
+        if bound is None:
+            return None
+        upper = None if bound.group(2).upper() == "UP" else _whole_number(bound.group(2))
+        return {"from": _whole_number(bound.group(1)), "to": upper, "discount": discount}
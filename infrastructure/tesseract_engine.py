@@ -0,0 +1,85 @@
+import importlib.util
+import threading
+
+# Tesseract's own defaults: English models, fully automatic page segmentation
+DEFAULT_LANG = "eng"
+DEFAULT_PSM = 3
+BACKENDS = ("tesserocr", "pytesseract")
+
+_local = threading.local()
+
+
+def tesserocr_available():
+    """Whether the tesserocr bindings to the Tesseract C API are installed"""
+    return importlib.util.find_spec("tesserocr") is not None
+
+
+class TesseractEngine:
+    """Tesseract OCR of binarized grayscale images
+
+    lang is a Tesseract language string ("eng", "ind", "eng+ind") and psm a page
+    segmentation mode (0-13). The tesserocr backend keeps one TessBaseAPI handle,
+    initialized on first use, with its language models loaded for the life of the
+    engine, and passes it the image buffer directly. pytesseract, used when
+    tesserocr is not installed, writes every image to a temp file and starts a
+    tesseract process per call.
+    """
+
+    def __init__(self, lang=DEFAULT_LANG, psm=DEFAULT_PSM, backend=None):
+        if backend is None:
+            backend = "tesserocr" if tesserocr_available() else "pytesseract"
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown Tesseract backend {backend!r}, expected one of {BACKENDS}")
+        self.lang = lang
+        self.psm = int(psm)
+        self.backend = backend
+        self._api = None
+
+    def image_to_string(self, image):
+        """Text of a 2-D uint8 image"""
+        if self.backend == "pytesseract":
+            import pytesseract
+
+            text = pytesseract.image_to_string(image, lang=self.lang, config=f"--psm {self.psm}")
+            # The tesseract CLI ends every page with a form feed; the API does not
+            return text[:-1] if text.endswith("\f") else text
+
+        import numpy as np
+
+        api = self._handle()
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        height, width = image.shape
+        api.SetImageBytes(image.tobytes(), width, height, 1, width)
+        try:
+            return api.GetUTF8Text()
+        finally:
+            # Drops the image and recognition results, keeps the loaded models
+            api.Clear()
+
+    def _handle(self):
+        if self._api is None:
+            import tesserocr
+
+            self._api = tesserocr.PyTessBaseAPI(lang=self.lang, psm=self.psm)
+        return self._api
+
+    def close(self):
+        """Releases the Tesseract API handle, if one was created"""
+        if self._api is not None:
+            self._api.End()
+            self._api = None
+
+
+def get_engine(lang=DEFAULT_LANG, psm=DEFAULT_PSM):
+    """The calling thread's engine for a language and page segmentation mode
+
+    A TessBaseAPI handle must not be shared between threads, so each thread keeps
+    its own engines; in a worker process that means one warm handle per worker,
+    reused by every page and document it OCRs.
+    """
+    engines = _local.__dict__.setdefault("engines", {})
+    key = (lang, int(psm))
+    engine = engines.get(key)
+    if engine is None:
+        engine = engines[key] = TesseractEngine(lang, psm)
+    return engine
@@ -24,10 +24,16 @@
 #     # ktp_result = ocr_service.process_ktp(ktp_path)
 #     # print(f"KTP OCR Result:\n{ktp_result}")
 
+import argparse
 import os
-import json
-from application.ocr_service import OCRService
-from infrastructure.easyocr_adapter import EasyOCRAdapter
+import sys
+import time
+from application.batch_runner import BatchRunner
+from application.watch_daemon import WatchDaemon
+from infrastructure.folder_watcher import DEFAULT_POLL_INTERVAL
+from infrastructure.instrumentation import BatchReport
+from infrastructure.job_queue import DEFAULT_MAX_ATTEMPTS, DEFAULT_RETRY_DELAY, JobQueue
+from infrastructure.output_sink import JsonFileSink, NDJSONSink
 
 # Directories containing PDF & Excel files
 pdf_dir = "SATP_Diskon_Skema/"
@@ -35,48 +41,183 @@ pdf_dir1 = "test/"
 excel_dir = "INT_Diskon_Skema/"
 ktp_dir = "KTP_Images/"  # Assuming KTP images are stored in this folder
 
-# Initialize OCR service
-ocr_adapter = EasyOCRAdapter()
-ocr_service = OCRService(ocr_adapter)
-
-# Create output directory
+# Output directory
 output_dir = "ocr_results/"
-os.makedirs(output_dir, exist_ok=True)
-
-# Process all PDF files
-for filename in os.listdir(pdf_dir1):
-    if filename.endswith(".pdf"):
-        pdf_path = os.path.join(pdf_dir1, filename)
-        print(f"Processing PDF: {filename}")
-        pdf_result = ocr_service.process_pdf(pdf_path)
-
-        # Save to JSON file
-        output_file = os.path.join(output_dir, f"{filename}.json")
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(pdf_result, f, ensure_ascii=False, indent=4)
-
-# Process all Excel files
-# for filename in os.listdir(excel_dir):
-#     if filename.endswith(".xlsx") or filename.endswith(".xls"):
-#         excel_path = os.path.join(excel_dir, filename)
-#         print(f"Processing Excel: {filename}")
-#         excel_result = ocr_service.process_excel(excel_path)
-#
-#         # Save to JSON file
-#         output_file = os.path.join(output_dir, f"{filename}.json")
-#         with open(output_file, "w", encoding="utf-8") as f:
-#             json.dump(excel_result, f, ensure_ascii=False, indent=4)
-#
-# # Process all KTP images
-# for filename in os.listdir(ktp_dir):
-#     if filename.endswith(".jpg") or filename.endswith(".png"):
-#         ktp_path = os.path.join(ktp_dir, filename)
-#         print(f"Processing KTP Image: {filename}")
-#         ktp_result = ocr_service.process_ktp(ktp_path)
-#
-#         # Save as text
-#         output_file = os.path.join(output_dir, f"{filename}.txt")
-#         with open(output_file, "w", encoding="utf-8") as f:
-#             f.write(ktp_result)
 
-print("OCR Processing Completed! Check 'ocr_results/' for output files.")
\ No newline at end of file
+# Content-addressed cache of extraction results
+cache_dir = ".ocr_cache/"
+
+# Job table of the watch-folder daemon
+job_db = ".ocr_jobs.sqlite3"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Extract discount-scheme PDFs to JSON")
+    parser.add_argument("--input-dir", nargs="+", default=[pdf_dir1],
+                        help="Directory (or directories) of PDF files to process")
+    parser.add_argument("--output-dir", default=output_dir, help="Directory for the JSON results")
+    parser.add_argument("--sink", choices=["files", "ndjson"], default="files",
+                        help="files: one pretty-printed JSON per PDF; ndjson: one append-only stream")
+    parser.add_argument("--ndjson-path", default=None,
+                        help="NDJSON output file (default: <output-dir>/results.ndjson[.gz])")
+    parser.add_argument("--gzip", action="store_true", help="Gzip-compress the NDJSON stream")
+    parser.add_argument("--pack-customers", action="store_true",
+                        help="Write list_customer to the NDJSON stream as one packed column of IDs "
+                             "(base64 int64) for bulk loading, instead of one object per outlet")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes for batch mode (1 = serial, in-process)")
+    parser.add_argument("--max-in-flight", type=int, default=None,
+                        help="Maximum documents submitted to the pool at once (default: 2 x workers)")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="Per-document timeout in seconds")
+    parser.add_argument("--shard-pages", type=int, default=None,
+                        help="Split PDFs longer than this many pages into ranges of that size, processed "
+                             "in parallel by the workers (the timeout then applies per range)")
+    parser.add_argument("--max-worker-mb", type=int, default=None,
+                        help="Per-worker memory ceiling in MB; a PDF that pushes a worker past it fails "
+                             "instead of the worker being OOM-killed")
+    parser.add_argument("--cache-dir", default=cache_dir,
+                        help="Result cache directory; unchanged PDFs are served from it")
+    parser.add_argument("--cache-max-mb", type=int, default=512, help="Result cache size limit in MB")
+    parser.add_argument("--no-cache", action="store_true", help="Always re-extract every PDF")
+    parser.add_argument("--ocr-mode", choices=["page", "hybrid"], default="page",
+                        help="page: OCR pages without a text layer; hybrid: OCR only untexted regions")
+    parser.add_argument("--ocr-lang", default="eng",
+                        help="Tesseract language(s) for OCR, e.g. eng, ind or eng+ind")
+    parser.add_argument("--ocr-psm", type=int, choices=range(14), default=3, metavar="{0..13}",
+                        help="Tesseract page segmentation mode (default 3: fully automatic)")
+    parser.add_argument("--product-master", default=None,
+                        help="CSV or Excel product master (SKU name, m_product_id) used to resolve m_product_id")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and extract PDFs as they are added to or changed in the input "
+                             "directories, through a durable job queue (see --job-db)")
+    parser.add_argument("--job-db", default=job_db, help="SQLite job table of --watch mode")
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help="Attempts per document in --watch mode before it is dead-lettered")
+    parser.add_argument("--retry-delay", type=float, default=DEFAULT_RETRY_DELAY,
+                        help="Seconds before the first retry in --watch mode, doubled for each further one")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL,
+                        help="Rescan interval in --watch mode where inotify is not available")
+    parser.add_argument("--report-dir", default=None,
+                        help="Write per-document, per-stage timings (stage_report.json/.csv) here")
+    parser.add_argument("--profile-top", type=int, default=0,
+                        help="Profile every PDF and keep cProfile dumps of the N slowest in <report-dir>/profiles")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    # Create output sink
+    try:
+        if args.sink == "ndjson":
+            ndjson_path = args.ndjson_path or os.path.join(
+                args.output_dir, "results.ndjson.gz" if args.gzip else "results.ndjson"
+            )
+            sink = NDJSONSink(ndjson_path, compress=args.gzip or None, pack_customers=args.pack_customers,
+                              input_dirs=args.input_dir)
+        else:
+            sink = JsonFileSink(args.output_dir, args.input_dir)
+    except ValueError as e:
+        sys.exit(f"error: {e}")
+
+    pdf_options = {"ocr_mode": args.ocr_mode, "ocr_lang": args.ocr_lang, "ocr_psm": args.ocr_psm,
+                   "product_master": args.product_master}
+    memory_limit = args.max_worker_mb and args.max_worker_mb * 1024 * 1024
+    if args.watch:
+        with sink, JobQueue(args.job_db, max_attempts=args.max_attempts, retry_delay=args.retry_delay) as queue:
+            WatchDaemon(
+                args.input_dir,
+                queue,
+                sink,
+                workers=args.workers,
+                timeout=args.timeout,
+                cache_dir=None if args.no_cache else args.cache_dir,
+                cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+                pdf_options=pdf_options,
+                memory_limit=memory_limit,
+                poll_interval=args.poll_interval,
+            ).run()
+        return
+
+    # Process all PDF files; each one is isolated, so a bad PDF only records an error entry
+    pdf_paths = [
+        os.path.join(input_dir, filename)
+        for input_dir in args.input_dir
+        for filename in sorted(os.listdir(input_dir))
+        if filename.endswith(".pdf")
+    ]
+    runner = BatchRunner(
+        max_workers=args.workers,
+        max_in_flight=args.max_in_flight,
+        timeout=args.timeout,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+        pdf_options=pdf_options,
+        profile=bool(args.report_dir and args.profile_top),
+        shard_pages=args.shard_pages,
+        memory_limit=memory_limit,
+    )
+    report = BatchReport(profile_top=args.profile_top)
+    with sink:
+        # Resume: skip documents a previous (possibly crashed) run already wrote
+        pending_paths = [pdf_path for pdf_path in pdf_paths if not sink.is_written(pdf_path)]
+        if len(pending_paths) < len(pdf_paths):
+            print(f"Skipping {len(pdf_paths) - len(pending_paths)} already-written PDF(s)")
+
+        failed = 0
+        for item in runner.run(pending_paths):
+            filename = os.path.basename(item.pdf_path)
+            document = report.add(item.pdf_path, item.metrics, ok=item.ok, profile=item.profile)
+            if not item.ok:
+                print(f"Failed PDF: {filename} ({item.error})")
+                sink.write_error(item.pdf_path, item.error)
+                failed += 1
+                continue
+
+            print(f"Processed PDF: {filename}")
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            sink.write(item.pdf_path, item.result)
+            report.add_stage(document, "serialize",
+                             time.perf_counter() - wall_start, time.process_time() - cpu_start)
+
+    if failed:
+        print(f"{failed} PDF(s) failed; error entries were recorded in the output")
+
+    counters = report.counter_totals()
+    if counters.get("pages_reused"):
+        print(f"Reused {counters['pages_reused']} of {counters['pages']} page(s) unchanged since an earlier "
+              f"document or revision ({report.pages_reused_ratio():.0%})")
+
+    if args.report_dir:
+        print(f"Stage report written to {report.write(args.report_dir)}")
+
+    # Process all Excel files
+    # for filename in os.listdir(excel_dir):
+    #     if filename.endswith(".xlsx") or filename.endswith(".xls"):
+    #         excel_path = os.path.join(excel_dir, filename)
+    #         print(f"Processing Excel: {filename}")
+    #         excel_result = ocr_service.process_excel(excel_path)
+    #
+    #         # Save to JSON file
+    #         output_file = os.path.join(output_dir, f"{filename}.json")
+    #         with open(output_file, "w", encoding="utf-8") as f:
+    #             json.dump(excel_result, f, ensure_ascii=False, indent=4)
+    #
+    # # Process all KTP images
+    # for filename in os.listdir(ktp_dir):
+    #     if filename.endswith(".jpg") or filename.endswith(".png"):
+    #         ktp_path = os.path.join(ktp_dir, filename)
+    #         print(f"Processing KTP Image: {filename}")
+    #         ktp_result = ocr_service.process_ktp(ktp_path)
+    #
+    #         # Save as text
+    #         output_file = os.path.join(output_dir, f"{filename}.txt")
+    #         with open(output_file, "w", encoding="utf-8") as f:
+    #             f.write(ktp_result)
+
+    print(f"OCR Processing Completed! Check '{args.output_dir}' for output files.")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,51 @@
+import argparse
+import asyncio
+
+from application.http_service import ExtractionService
+
+# Content-addressed cache of extraction results, shared with main.py
+cache_dir = ".ocr_cache/"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Local HTTP service extracting PDF, Excel and KTP uploads")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (local only by default)")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--queue-size", type=int, default=64,
+                        help="Uploads waiting for a worker before new ones get 429")
+    parser.add_argument("--timeout", type=float, default=120, help="Per-document timeout in seconds")
+    parser.add_argument("--max-worker-mb", type=int, default=None,
+                        help="Per-worker memory ceiling in MB; a PDF that pushes a worker past it fails "
+                             "instead of the worker being OOM-killed")
+    parser.add_argument("--cache-dir", default=cache_dir, help="Result cache directory")
+    parser.add_argument("--cache-max-mb", type=int, default=512, help="Result cache size limit in MB")
+    parser.add_argument("--no-cache", action="store_true", help="Always re-extract every PDF")
+    parser.add_argument("--ocr-mode", choices=["page", "hybrid"], default="page",
+                        help="page: OCR pages without a text layer; hybrid: OCR only untexted regions")
+    parser.add_argument("--ocr-lang", default="eng",
+                        help="Tesseract language(s) for OCR, e.g. eng, ind or eng+ind")
+    parser.add_argument("--ocr-psm", type=int, choices=range(14), default=3, metavar="{0..13}",
+                        help="Tesseract page segmentation mode (default 3: fully automatic)")
+    parser.add_argument("--product-master", default=None,
+                        help="CSV or Excel product master (SKU name, m_product_id) used to resolve m_product_id")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    service = ExtractionService(
+        workers=args.workers,
+        queue_size=args.queue_size,
+        timeout=args.timeout,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+        memory_limit=args.max_worker_mb and args.max_worker_mb * 1024 * 1024,
+        pdf_options={"ocr_mode": args.ocr_mode, "ocr_lang": args.ocr_lang, "ocr_psm": args.ocr_psm,
+                     "product_master": args.product_master},
+    )
+    asyncio.run(service.serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
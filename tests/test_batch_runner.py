@@ -0,0 +1,47 @@
+import os
+import time
+
+from application.batch_runner import BatchRunner
+from application.ocr_service import OCRService
+from benchmarks.synthetic_pdf import build_pdf
+from infrastructure.memory_guard import MemoryLimitExceeded
+from infrastructure.pdf_handler import PDFHandler
+
+
+def test_timeout_during_ocr_fails_the_document(tmp_path, monkeypatch):
+    # Four pages without a text layer: every page goes through the OCR fallback
+    pdf_path = tmp_path / "scanned.pdf"
+    pdf_path.write_bytes(build_pdf([[]] * 4))
+
+    def slow_ocr(gray, engine=None):
+        time.sleep(1)
+        return "NOMOR: CP-1"
+
+    monkeypatch.setattr(PDFHandler, "ocr_grayscale", staticmethod(slow_ocr))
+
+    start = time.perf_counter()
+    [item] = BatchRunner(max_workers=1, timeout=0.5).run([str(pdf_path)])
+
+    assert not item.ok
+    assert item.error.startswith("DocumentTimeoutError")
+    assert item.metrics["counters"].get("ocr_errors", 0) == 0
+    assert time.perf_counter() - start < 1.5
+
+
+def test_worker_over_memory_ceiling_is_retired(monkeypatch):
+    # Pool workers are forked, so they inherit the patched method
+    def extract_pdf(self, pdf_path):
+        if os.path.basename(pdf_path) == "bloated.pdf":
+            raise MemoryLimitExceeded(str(os.getpid()))
+        time.sleep(0.1)
+        return {"pid": os.getpid()}
+
+    monkeypatch.setattr(OCRService, "extract_pdf", extract_pdf)
+    paths = ["bloated.pdf"] + [f"listing-{i}.pdf" for i in range(8)]
+
+    bloated, *others = BatchRunner(max_workers=2).run(paths)
+
+    assert bloated.error.startswith("MemoryLimitExceeded")
+    retired_pid = int(bloated.error.split(": ")[1])
+    assert all(item.ok for item in others)
+    assert retired_pid not in {item.result["pid"] for item in others}
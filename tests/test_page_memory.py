@@ -0,0 +1,47 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from application.batch_runner import BatchRunner
+from benchmarks.bench_page_memory import write_listing_pdf
+from infrastructure import memory_guard
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Holding every page's layout objects peaks around 1.6 GB on this PDF; streamed, around 120 MB
+MAX_STREAMED_GROWTH_MB = 250
+
+
+@pytest.fixture(scope="module")
+def listing_pdf(tmp_path_factory):
+    """Synthetic 1,000-page distributor listing with a full-page scan every 50 pages"""
+    path = tmp_path_factory.mktemp("page_memory") / "listing.pdf"
+    write_listing_pdf(path, 1000)
+    return str(path)
+
+
+def test_streamed_extraction_keeps_peak_rss_bounded(listing_pdf):
+    # In its own process, so ru_maxrss covers this extraction only
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_page_memory", "--mode", "streamed", "--pdf", listing_pdf],
+        cwd=REPO_ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+    stats = json.loads(output.strip().splitlines()[-1])
+
+    assert stats["pages"] == 1000
+    assert stats["peak_growth_mb"] < MAX_STREAMED_GROWTH_MB
+
+
+def test_memory_ceiling_fails_the_document(listing_pdf, monkeypatch):
+    # The serial runner sets the ceiling in this process; restored afterwards
+    monkeypatch.setattr(memory_guard, "_memory_limit", None)
+    limit = memory_guard.current_rss() + 20 * 2 ** 20
+
+    [item] = BatchRunner(max_workers=1, memory_limit=limit).run([listing_pdf])
+
+    assert not item.ok
+    assert item.error.startswith("MemoryLimitExceeded")
+    assert item.metrics is not None